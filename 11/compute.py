@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+
 import numpy as np
 from PIL import Image
 
-from src.interpreter import OptcodeInterpreter
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import Channel
+from intcode import CompiledOptcodeInterpreter
+
 
 class HullRobot:
 
@@ -28,31 +35,38 @@ class HullRobot:
         return self.position
 
 
-def is_duplicate(point, seen):
-    a, b = point
-    duplicated = False
-    for el in seen:
-        x, y = el
-        if a == x and b == y:
-            duplicated = True
-            break
-    return duplicated
+class HullCanvas:
+
+    """
+        Hull panels painted by the robot.
+        Colors are kept in a dict by position, unpainted panels are black.
+    """
+    def __init__(self):
+        self.colors = {}
+
+    def paint(self, position, color):
+        self.colors[position] = color
 
+    def get_color(self, position):
+        return self.colors.get(position, 0)
 
-"""
-Return the delta needed to align the image to (0,0)
-and the image size
+    def count_painted(self):
+        return len(self.colors)
 
-"""
-def get_image_shape(table):
-    min_x = min(list(map(lambda el: el[1], table)))
-    min_y = min(list(map(lambda el: el[0], table)))
-    max_x = max(list(map(lambda el: el[1], table)))
-    max_y = max(list(map(lambda el: el[0], table)))
-    delta = (-1 * min_y, -1 * min_x)
-    dy = max_y - min_y + 1
-    dx = max_x - min_x + 1
-    return delta, (dy, dx)
+    """
+        Return the white panels as a uint8 image, 255 for white,
+        cropped to the painted area
+    """
+    def to_image(self):
+        white = [position for position, color in self.colors.items() if color == 1]
+        if not white:
+            return np.zeros(shape=(0, 0), dtype=np.uint8)
+        points = np.array(white)
+        origin = points.min(axis=0)
+        dy, dx = points.max(axis=0) - origin + 1
+        image = np.zeros(shape=(dy, dx), dtype=np.uint8)
+        image[points[:, 0] - origin[0], points[:, 1] - origin[1]] = 255
+        return image
 
 
 def compute(paint_start_point=False):
@@ -61,46 +75,38 @@ def compute(paint_start_point=False):
         optcode_raw = hand.read()
     optcode = list(map(lambda el: int(el), optcode_raw.split(",")))
 
-    interpreter = OptcodeInterpreter(optcode, quiet_mode=True)
-    interpreter.run_async()
+    interpreter = CompiledOptcodeInterpreter(optcode, input_queue=Channel(),
+                                             output_queue=Channel(), quiet_mode=True)
     start_point = (0, 0)
     robot = HullRobot(start_point)
-    table = []
+    canvas = HullCanvas()
     if paint_start_point:
-        table.append(start_point)
-    painted_points = []
-    while True:
-        pos = robot.get_position()
-        color = 1 if pos in table else 0
-        interpreter.input.put(color)
-        try:
-            output_color = interpreter.output.get(timeout=1)
-        except Exception:
-            break
-        turn = interpreter.output.get()
-        if output_color == 1 and not is_duplicate(pos, table):
-            table.append(pos)
-        elif output_color == 0 and is_duplicate(pos, table):
-            table.remove(pos)
-        if not is_duplicate(pos, painted_points):
-            painted_points.append(pos)
-        if turn == 0:
-            robot.rotate_left()
-        else:
-            robot.rotate_right()
-        robot.move()
-        # print("Debug", len(table))
+        canvas.paint(start_point, 1)
+
+    def apply_instructions():
+        if not interpreter.output.empty():
+            output_color = interpreter.output.get()
+            turn = interpreter.output.get()
+            canvas.paint(robot.get_position(), output_color)
+            if turn == 0:
+                robot.rotate_left()
+            else:
+                robot.rotate_right()
+            robot.move()
+
+    def on_input_requested():
+        apply_instructions()
+        interpreter.input.put(canvas.get_color(robot.get_position()))
+
+    interpreter.set_input_request_listener(on_input_requested)
+    interpreter.run()
+    apply_instructions()
     if paint_start_point:
-        delta, size = get_image_shape(table)
-        image = np.zeros(shape=size, dtype=np.uint8)
-        dy, dx = delta
-        for y, x in table:
-            image[y+dy, x+dx] = 255
-        dec_image = Image.fromarray(image)
+        dec_image = Image.fromarray(canvas.to_image())
         dec_image.save("res.png")
         print("Saved code to image res.png")
     else:
-        print("Painted points: %d" % len(painted_points))
+        print("Painted points: %d" % canvas.count_painted())
 
 
 compute(paint_start_point=False)
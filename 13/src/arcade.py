@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+
+import numpy as np
+
+from intcode import Channel
+from intcode import CompiledOptcodeInterpreter
+
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_BLOCK = 2
+TILE_PADDLE = 3
+TILE_BALL = 4
+
+RENDER_MAP_EMOJI = {
+    TILE_EMPTY: ' ',
+    TILE_WALL: '🎄',
+    TILE_BLOCK: '❄️',
+    TILE_PADDLE: '🛷',
+    TILE_BALL: '🌟',
+}
+
+RENDER_MAP = {
+    TILE_EMPTY: ' ',
+    TILE_WALL: 'X',
+    TILE_BLOCK: '#',
+    TILE_PADDLE: '=',
+    TILE_BALL: 'o',
+}
+
+
+class ArcadeScreen:
+
+    """
+        Arcade cabinet screen.
+        Tiles are kept in a NumPy array indexed by [y, x],
+        grown when the game draws outside of it.
+    """
+    def __init__(self):
+        self.screen = np.zeros(shape=(0, 0), dtype=np.uint8)
+        self.segment_display = 0
+        self._position_ball = None
+        self._position_paddle = None
+        self._previous_ball = None
+        self._dirty = set()
+        self._renderer = None
+
+    def _grow(self, x, y):
+        height, width = self.screen.shape
+        if y < height and x < width:
+            return
+        # Pad to at least double the size so that growing row by row stays cheap
+        new_height = max(height, y + 1) if y < height else max(y + 1, 2 * height)
+        new_width = max(width, x + 1) if x < width else max(x + 1, 2 * width)
+        self.screen = np.pad(self.screen, ((0, new_height - height), (0, new_width - width)))
+
+    def draw(self, position, tile):
+        x, y = position
+        if x == -1 and y == 0:
+            self.segment_display = tile
+        else:
+            self._grow(x, y)
+            if self.screen[y, x] != tile:
+                self.screen[y, x] = tile
+                self._dirty.add((x, y))
+            if tile == TILE_PADDLE:
+                self._position_paddle = position
+            elif tile == TILE_BALL:
+                self._previous_ball = self._position_ball
+                self._position_ball = position
+
+    def get_ball_position(self):
+        return self._position_ball
+
+    def get_ball_velocity(self):
+        if self._previous_ball is None:
+            return None
+        (x, y), (prev_x, prev_y) = self._position_ball, self._previous_ball
+        return x - prev_x, y - prev_y
+
+    def get_paddle_position(self):
+        return self._position_paddle
+
+    def get_screen(self):
+        return self._get_visible()
+
+    def get_score(self):
+        return self.segment_display
+
+    def count_tiles(self, tile):
+        return int(np.count_nonzero(self.screen == tile))
+
+    def _get_visible(self):
+        # Drop the padding that was never drawn
+        rows = np.flatnonzero(self.screen.any(axis=1))
+        columns = np.flatnonzero(self.screen.any(axis=0))
+        if len(rows) == 0:
+            return self.screen[:0, :0]
+        return self.screen[:rows[-1] + 1, :columns[-1] + 1]
+
+    """
+        Return the tiles changed since the last call
+    """
+    def pop_dirty(self):
+        dirty = self._dirty
+        self._dirty = set()
+        return dirty
+
+    """
+        Show the screen in the terminal, see TerminalRenderer
+
+        :force boolean: true to draw even if the last frame is too recent
+    """
+    def render(self, force=False):
+        if self._renderer is None:
+            self._renderer = TerminalRenderer(self)
+        self._renderer.render(force)
+
+
+class TerminalRenderer:
+
+    """
+        Draw an arcade screen in a terminal with ANSI escape codes.
+
+        The first frame clears the terminal and draws every tile, the next
+        ones only move the cursor to the tiles changed since, and the score.
+        Frames asked for faster than max_fps are skipped: their changes
+        are drawn with the next one.
+
+        :arcade_screen ArcadeScreen: screen to draw
+        :max_fps int: frames drawn per second at most
+        :stream file: terminal to write to
+    """
+    def __init__(self, arcade_screen, max_fps=30, stream=None):
+        self.arcade_screen = arcade_screen
+        self.min_interval = 1.0 / max_fps
+        self.stream = stream if stream is not None else sys.stdout
+        self._last_frame = None
+        self._score = None
+
+    def _draw_tiles(self, positions):
+        screen = self.arcade_screen.screen
+        commands = []
+        cursor = None
+        for x, y in sorted(positions, key=lambda position: (position[1], position[0])):
+            if cursor != (x, y):
+                # Row 1 is the score, rows and columns start from 1
+                commands.append("\x1b[%d;%dH" % (y + 2, x + 1))
+            commands.append(RENDER_MAP[screen[y, x]])
+            cursor = (x + 1, y)
+        return commands
+
+    def render(self, force=False):
+        now = time.monotonic()
+        if not force and self._last_frame is not None and now - self._last_frame < self.min_interval:
+            return False
+        self._last_frame = now
+        arcade_screen = self.arcade_screen
+        dirty = arcade_screen.pop_dirty()
+        commands = []
+        if self._score is None:
+            commands.append("\x1b[2J")
+            height, width = arcade_screen.get_screen().shape
+            dirty = [(x, y) for y in range(height) for x in range(width)]
+        if arcade_screen.get_score() != self._score:
+            self._score = arcade_screen.get_score()
+            commands.append("\x1b[1;1H\tScore: %d\x1b[K" % self._score)
+        commands += self._draw_tiles(dirty)
+        # Leave the cursor under the screen
+        height = arcade_screen.get_screen().shape[0]
+        commands.append("\x1b[%d;1H" % (height + 2))
+        self.stream.write("".join(commands))
+        self.stream.flush()
+        return True
+
+
+class Player:
+
+    """
+        Keep the paddle under the ball
+    """
+    def __init__(self, arcade_screen):
+        self.arcade_screen = arcade_screen
+
+    def act(self):
+        ball_x, _ = self.arcade_screen.get_ball_position()
+        paddle_x, _ = self.arcade_screen.get_paddle_position()
+        return int(np.sign(ball_x - paddle_x))
+
+
+class TurboPlayer(Player):
+
+    """
+        Move the paddle to where the ball will land.
+        The fall of the ball is simulated on the screen, bouncing on walls
+        and blocks. When the landing column is not known, because the ball
+        goes up or bounces back up on a block, or when the paddle can not
+        get there in time, the paddle follows the ball as Player does.
+        So it does when the ball did not move since the last frame: it
+        bounced in place and its velocity is not known.
+    """
+    def __init__(self, arcade_screen):
+        super().__init__(arcade_screen)
+        self._last_ball = None
+
+    def _is_solid(self, x, y, broken):
+        screen = self.arcade_screen.screen
+        height, width = screen.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return True
+        return (x, y) not in broken and screen[y, x] in (TILE_WALL, TILE_BLOCK)
+
+    def _bounce(self, x, y, broken):
+        if self.arcade_screen.screen[y, x] == TILE_BLOCK:
+            broken.add((x, y))
+
+    """
+        Return the column where the falling ball reaches the row above
+        the paddle and the moves left until then, None if it goes up first
+    """
+    def _predict_landing(self):
+        velocity = self.arcade_screen.get_ball_velocity()
+        if velocity is None or velocity[1] <= 0:
+            return None
+        x, y = self.arcade_screen.get_ball_position()
+        _, paddle_y = self.arcade_screen.get_paddle_position()
+        dx, dy = velocity
+        # Blocks the ball breaks on the way down
+        broken = set()
+        moves = 0
+        while y < paddle_y - 1:
+            if self._is_solid(x + dx, y, broken):
+                self._bounce(x + dx, y, broken)
+                dx = -dx
+            if self._is_solid(x, y + dy, broken):
+                # Bounced back up
+                return None
+            if self._is_solid(x + dx, y + dy, broken):
+                self._bounce(x + dx, y + dy, broken)
+                return None
+            x, y = x + dx, y + dy
+            moves += 1
+        return x, moves
+
+    def act(self):
+        ball = self.arcade_screen.get_ball_position()
+        moved = ball != self._last_ball
+        self._last_ball = ball
+        landing = self._predict_landing() if moved else None
+        if landing is None:
+            return super().act()
+        target, moves = landing
+        paddle_x, _ = self.arcade_screen.get_paddle_position()
+        if abs(target - paddle_x) > moves:
+            return super().act()
+        return int(np.sign(target - paddle_x))
+
+
+class ArcadeGame:
+
+    """
+        Run the arcade game headless on a single thread.
+        Output triples are drawn whenever the game asks for input,
+        the player chooses the joystick position from the screen.
+
+        :optcode int array: game program
+        :player_class class: built with the screen, act() returns -1, 0 or 1
+        :free_play boolean: true to insert quarters and play, false to only draw the screen
+    """
+    def __init__(self, optcode, player_class=TurboPlayer, free_play=True):
+        self.interpreter = CompiledOptcodeInterpreter(optcode, input_queue=Channel(),
+                                                      output_queue=Channel(), quiet_mode=True)
+        if free_play:
+            self.interpreter.memory[0] = 2
+        self.arcade_screen = ArcadeScreen()
+        self.player = player_class(self.arcade_screen)
+        self.interpreter.set_input_request_listener(self._on_input_requested)
+
+    def _draw(self):
+        output = self.interpreter.output
+        while not output.empty():
+            x = output.get()
+            y = output.get()
+            tile = output.get()
+            self.arcade_screen.draw((x, y), tile)
+
+    def _on_input_requested(self):
+        self._draw()
+        self.interpreter.input.put(self.player.act())
+
+    """
+        Play until the game halts and return the final score
+    """
+    def run(self):
+        self.interpreter.run()
+        self._draw()
+        return self.arcade_screen.get_score()
@@ -1,6 +1,17 @@
 #!/usr/bin/env python3
 
-from src.interpreter import OptcodeInterpreter
+import os
+import sys
+
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import CompiledOptcodeInterpreter
+from intcode import OptcodeTrace
+from intcode import replay_trace
+
+TRACE_PATH = "droid.trace"
 
 POINT_EMPTY = 0
 POINT_WALL = 1
@@ -11,11 +22,12 @@ MOVE_SOUTH = 2
 MOVE_EAST = 3
 MOVE_WEST = 4
 
-
-def get_linfy_distance(a, b):
-    x_a, y_a = a
-    x_b, y_b = b
-    return abs(x_a - x_b) + abs(y_a - y_b)
+REVERSE_MOVE = {
+    MOVE_NORTH: MOVE_SOUTH,
+    MOVE_SOUTH: MOVE_NORTH,
+    MOVE_EAST: MOVE_WEST,
+    MOVE_WEST: MOVE_EAST,
+}
 
 
 def get_surrounding_points(point):
@@ -27,157 +39,103 @@ def get_surrounding_points(point):
     return [(MOVE_NORTH, north), (MOVE_SOUTH, south), (MOVE_EAST, east), (MOVE_WEST, west)]
 
 
-class SpacePath:
-
-    def __init__(self, start, directions=None, end_point=None):
-        self.start = start
-        self.directions = directions if directions is not None else []
-        self.end = end_point if end_point is not None else start
-
-    def get_directions(self):
-        return self.directions
-
-    def get_end_point(self):
-        return self.end
-
-    def get_distance(self):
-        return len(self.directions)
-
-    def append_point(self, point, direction):
-        self.directions.append((direction, point))
-        self.end = point
-
-    def clone(self):
-        directions = [direction for direction in self.directions]
-        return SpacePath(self.start, directions, self.end)
-
-
 class SpaceMap:
 
+    """
+        Map explored by the droid.
+
+        Every known point is in a dict, open points also keep their
+        distance from the start over the known points. Distances are
+        updated incrementally: a new open point takes the distance of its
+        closest known neighbour, and any shortcut it opens is propagated
+        breadth first. Walls never shorten a path, so discovering them
+        changes nothing.
+    """
     def __init__(self):
         self._space = dict()
-        self._unknown = dict()
         self._distance_from_start = dict()
-        self._distance_from_start[(0, 0)] = 0
 
-    def _update_unknown_points(self, position):
-        surrounding = get_surrounding_points(position)
-        from_distance = self._distance_from_start[position]
-        for _, point in surrounding:
-            if point not in self._distance_from_start:
-                self._distance_from_start[point] = from_distance + 1
-                self._unknown[point] = 1
+    def _relax(self, position):
+        pending = deque([position])
+        while pending:
+            point = pending.popleft()
+            distance = self._distance_from_start[point] + 1
+            for _, neighbour in get_surrounding_points(point):
+                if neighbour not in self._distance_from_start:
+                    continue
+                if self._distance_from_start[neighbour] > distance:
+                    self._distance_from_start[neighbour] = distance
+                    pending.append(neighbour)
 
     def explore(self, position, point_type):
         self._space[position] = point_type
-        if position in self._unknown:
-            del self._unknown[position]
-        if point_type != POINT_WALL:
-            self._update_unknown_points(position)
+        if point_type == POINT_WALL or position in self._distance_from_start:
+            return
+        distances = [self._distance_from_start[neighbour] for _, neighbour in get_surrounding_points(position)
+                     if neighbour in self._distance_from_start]
+        self._distance_from_start[position] = min(distances) + 1 if distances else 0
+        self._relax(position)
 
-    def get_empty_positions(self):
-        positions = []
-        for el in self._space:
-            if self._space[el] == POINT_EMPTY:
-                positions.append(el)
-        return positions
+    def is_known(self, point):
+        return point in self._space
 
-    def get_unknown_points(self):
-        return self._unknown
+    def get_empty_positions(self):
+        return [position for position, point_type in self._space.items() if point_type == POINT_EMPTY]
 
     def get_distance_from_start(self, position):
         return self._distance_from_start[position]
 
-    def get_path(self, start, target):
-        possible_paths = list()
-        explored_points = list()
-        starting_path = SpacePath(start)
-        possible_paths.append(starting_path)
-        path_to_target = None
-        while path_to_target is None:
-            # Get the next path to examine
-            possible_paths = sorted(possible_paths, key=lambda path: path.get_distance() + get_linfy_distance(path.get_end_point(), target))
-            best_path = possible_paths[0]
-            end_point = best_path.get_end_point()
-            # Expand the path
-            surrounding = get_surrounding_points(end_point)
-            for direction, point in surrounding:
-                if point in explored_points:
-                    continue
-                new_path = best_path.clone()
-                new_path.append_point(point, direction)
-                if get_linfy_distance(point, target) == 0:
-                    # This is my target path !
-                    path_to_target = new_path
-                    break
-                elif point in self._space and self._space[point] != POINT_WALL:
-                    possible_paths.append(new_path)
-            if path_to_target is not None:
-                break
-            explored_points.append(end_point)
-            # Remove the read path
-            del possible_paths[0]
-        return path_to_target
-
 
 class RepairDroid:
 
+    """
+        Explore the whole map depth first.
+        The droid always steps to an unknown neighbour if it has one,
+        and otherwise goes back the way it came: no path is ever planned.
+    """
     def __init__(self):
         self.position = (0, 0)
         self.oxygen_position = None
-        self._path = None
-        self._path_index = None
+        self._moves = []
         self._requested_position = None
+        self._requested_move = None
+        self._backtracking = False
 
     def get_position(self):
         return self.position
 
-    def set_position(self, position):
-        self.position = position
-
     def get_requested_position(self):
         return self._requested_position
 
-    def set_oxigen_position(self, position):
-        self.oxygen_position = position
-
     def get_oxygen_position(self):
         return self.oxygen_position
 
-    def set_path(self, path):
-        self._path = path
-        self._path_index = 0
+    """
+        Update the droid after a move, given the status sent back
+    """
+    def moved(self, status):
+        if status == 0:
+            return
+        self.position = self._requested_position
+        if status == 2:
+            self.oxygen_position = self.position
+        if not self._backtracking:
+            self._moves.append(self._requested_move)
 
     def act(self, space):
-        move, requested_position = self._pick_direction(space)
-        self._requested_position = requested_position
-        return move
-
-    def _pick_direction(self, space):
-        direction = self._follow_path()
-        if direction is not None:
-            return direction
-        unknown_points = space.get_unknown_points()
-        if len(unknown_points) == 0:
-            return None, None
-        sorted_unknown = sorted(unknown_points, key=lambda point: space.get_distance_from_start(point))
-        target = sorted_unknown[0]
-        path = space.get_path(self.get_position(), target)
-        self.set_path(path)
-        return self._follow_path()
-
-    def _follow_path(self):
-        if self._path is None:
-            return None
-        directions = self._path.get_directions()
-        path_idx = self._path_index
-        if path_idx < len(directions):
-            self._path_index += 1
-            return directions[path_idx]
-        else:
-            self._path = None
-            self._path_index = None
+        for move, point in get_surrounding_points(self.position):
+            if not space.is_known(point):
+                self._backtracking = False
+                self._requested_move = move
+                self._requested_position = point
+                return move
+        if not self._moves:
             return None
+        move = REVERSE_MOVE[self._moves.pop()]
+        self._backtracking = True
+        self._requested_move = move
+        self._requested_position = dict(get_surrounding_points(self.position))[move]
+        return move
 
 
 def read_input():
@@ -212,12 +170,15 @@ def compute_oxygen_time(space, oxigen_position):
     print("Time needed for oxygen fill:", dist)
 
 
-def compute():
+def compute(trace_path=None):
     space = SpaceMap()
     droid = RepairDroid()
     space.explore(droid.get_position(), POINT_EMPTY)
     optcode = read_input()
-    interpreter = OptcodeInterpreter(optcode, quiet_mode=True)
+    interpreter = CompiledOptcodeInterpreter(optcode, quiet_mode=True)
+    trace = OptcodeTrace()
+    if trace_path is not None:
+        interpreter.set_trace(trace)
 
     def on_input_requested():
         if not interpreter.output.empty():
@@ -230,22 +191,40 @@ def compute():
             elif status == 1:
                 # Empty space, position updated
                 space.explore(requested_point, POINT_EMPTY)
-                droid.set_position(requested_point)
             elif status == 2:
                 # Oxygen space, position updated
                 space.explore(requested_point, POINT_OXYGEN)
-                droid.set_oxigen_position(requested_point)
-                droid.set_position(requested_point)
-                print("Oxigen found at distance:", space.get_distance_from_start(requested_point))
+            droid.moved(status)
         move = droid.act(space)
         if move is None:
-            compute_oxygen_time(space, droid.get_oxygen_position())
+            # The whole map is known
+            oxygen_position = droid.get_oxygen_position()
+            print("Oxigen found at distance:", space.get_distance_from_start(oxygen_position))
+            compute_oxygen_time(space, oxygen_position)
+            interpreter.stop()
             interpreter.input.put(0)
         else:
             interpreter.input.put(move)
 
     interpreter.set_input_request_listener(on_input_requested)
     interpreter.run()
-
-
-compute()
+    if trace_path is not None:
+        trace.save(trace_path)
+
+
+"""
+    Run the droid moves of a recorded exploration again
+    and return the number of moves
+"""
+def replay(trace_path=TRACE_PATH):
+    interpreter = CompiledOptcodeInterpreter(read_input(), quiet_mode=True)
+    trace = OptcodeTrace.load(trace_path)
+    replay_trace(interpreter, trace)
+    return len(trace.get_inputs())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        print("Replayed moves:", replay(*sys.argv[2:3]))
+    else:
+        compute(trace_path=TRACE_PATH if "record" in sys.argv[1:] else None)
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
-from functools import reduce
+import os
 import sys
 
-from src.interpreter import OptcodeInterpreter
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import CompiledOptcodeInterpreter
+from src.compression import MoveCompressor
 
 POINT_EMPTY = 46
 POINT_SCAFFOLD = 35
@@ -14,77 +19,63 @@ EAST = (1, 0)
 WEST = (-1, 0)
 
 MAX_ROUTINE_SIZE = 20
-
-
-def get_linfy_distance(a, b):
-    x_a, y_a = a
-    x_b, y_b = b
-    return abs(x_a - x_b) + abs(y_a - y_b)
-
-
-def get_surrounding_points(point):
-    x, y = point
-    north = (x, y + 1)
-    south = (x, y - 1)
-    east = (x + 1, y)
-    west = (x - 1, y)
-    return [north, south, east, west]
+N_ROUTINES = 3
 
 
 class Space:
 
-    def __init__(self):
-        self.space = {}
-        self.scaffolds = []
+    """
+        Scaffold view, as a uint8 grid of ascii codes indexed by [y, x]
+    """
+    def __init__(self, grid):
+        self.grid = grid
         self.droid_start = None
-
-    def draw(self, position, element):
-        self.space[position] = element
-        if element == POINT_SCAFFOLD:
-            self.scaffolds.append(position)
-        elif chr(element) == "^":
-            self.droid_start = position
-
-    def get_scaffolds(self):
-        return self.scaffolds
+        droid = np.argwhere(grid == ord("^"))
+        if len(droid) > 0:
+            y, x = droid[0]
+            self.droid_start = (int(x), int(y))
 
     def is_scaffold(self, point):
-        return point in self.space and self.space[point] == POINT_SCAFFOLD
+        x, y = point
+        height, width = self.grid.shape
+        return 0 <= x < width and 0 <= y < height and self.grid[y, x] == POINT_SCAFFOLD
 
     def get_droid_start(self):
         return self.droid_start
 
+    """
+        Return the scaffold intersections, as a mask over the grid
+    """
+    def get_intersections(self):
+        scaffolds = self.grid == POINT_SCAFFOLD
+        intersections = np.zeros_like(scaffolds)
+        intersections[1:-1, 1:-1] = (scaffolds[1:-1, 1:-1] & scaffolds[:-2, 1:-1] & scaffolds[2:, 1:-1] &
+                                     scaffolds[1:-1, :-2] & scaffolds[1:-1, 2:])
+        return intersections
+
     def print(self):
-        y = 0
-        while True:
-            if (0, y) not in self.space:
-                break
-            x = 0
-            while True:
-                pos = (x, y)
-                if pos not in self.space:
-                    sys.stdout.write("\n")
-                    break
-                sys.stdout.write(chr(self.space[pos]))
-                x += 1
-            y += 1
+        for row in self.grid:
+            sys.stdout.write(row.tobytes().decode())
+            sys.stdout.write("\n")
         sys.stdout.flush()
 
 
 class Camera:
 
-    def __init__(self, space):
-        self.x = 0
-        self.y = 0
-        self.space = space
+    """
+        Collect the camera output as it is sent, as an output listener,
+        and decode it into a grid in one pass
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.view = self.buffer.append
 
-    def view(self, element):
-        if element == 10:
-            self.x = 0
-            self.y += 1
-        else:
-            self.space.draw((self.x, self.y), element)
-            self.x += 1
+    def get_space(self):
+        data = bytes(self.buffer).rstrip(b"\n")
+        width = data.index(b"\n")
+        # Every row is followed by a newline
+        rows = np.frombuffer(data + b"\n", dtype=np.uint8).reshape(-1, width + 1)
+        return Space(rows[:, :width])
 
 
 class Droid:
@@ -143,30 +134,18 @@ def read_input():
 
 
 def get_space_configuration():
-    space = Space()
-    camera = Camera(space)
+    camera = Camera()
     optcode = read_input()
-    interpreter = OptcodeInterpreter(optcode, quiet_mode=True)
+    interpreter = CompiledOptcodeInterpreter(optcode, quiet_mode=True)
+    interpreter.set_output_request_listener(camera.view)
     interpreter.run()
-    while not interpreter.output.empty():
-        element = interpreter.output.get()
-        camera.view(element)
-    return space
+    return camera.get_space()
 
 
 def compute_intersections():
     space = get_space_configuration()
-    intersections = list()
-    for scaffold in space.get_scaffolds():
-        surrounding = get_surrounding_points(scaffold)
-        all_scaffolds = reduce(lambda x, y: x and y, map(lambda point: space.is_scaffold(point), surrounding))
-        if all_scaffolds:
-            intersections.append(scaffold)
-    total = 0
-    for el in intersections:
-        x, y = el
-        total = total + x * y
-    return total
+    ys, xs = np.nonzero(space.get_intersections())
+    return int(np.sum(xs * ys))
 
 
 def get_all_moves(space):
@@ -196,80 +175,16 @@ def get_all_moves(space):
     return moves
 
 
-def sequence_at(sequence, steps, k, filled=None):
-    contained = True
-    if filled is None:
-        filled = [0] * len(steps)
-    for i, n in enumerate(sequence):
-        j = k + i
-        if j >= len(steps) or steps[j] != n or filled[j] != 0:
-            contained = False
-            break
-    return contained
-
-
-def get_first_gap(moves, filled):
-    gap = []
-    gap_started = False
-    for i, is_filled in enumerate(filled):
-        if gap_started:
-            if is_filled:
-                break
-            else:
-                gap.append(moves[i])
-        elif not is_filled:
-            gap_started = True
-            gap.append(moves[i])
-    return gap
-
-
-def fill_with(sequence, seq_number, moves, filled=None):
-    if filled is None:
-        filled = [0] * len(moves)
-    else:
-        filled = [status for status in filled]
-    k = 0
-    while k < len(moves):
-        if sequence_at(sequence, moves, k, filled):
-            for i in range(len(sequence)):
-                if i == 0:
-                    filled[k + i] = seq_number
-                else:
-                    filled[k + i] = 1
-            k = k + len(sequence)
-        else:
-            k = k + 1
-    return filled
-
-
 def split_moves(moves):
-    final_sequence = None
-    for size_a in range(MAX_ROUTINE_SIZE + 1, 1, -1):
-        a = moves[:size_a]
-        filled_a = fill_with(a, 10, moves)
-        gap_a = get_first_gap(moves, filled_a)
-        max_b = min(len(gap_a), MAX_ROUTINE_SIZE)
-        for size_b in range(max_b + 1, 1, -1):
-            b = gap_a[:size_b]
-            filled_b = fill_with(b, 20, moves, filled_a)
-            gap_b = get_first_gap(moves, filled_b)
-            max_c = min(len(gap_b), MAX_ROUTINE_SIZE)
-            for size_c in range(max_c + 1, 1, -1):
-                c = gap_b[:size_c]
-                filled_c = fill_with(c, 30, moves, filled_b)
-                if min(filled_c) == 1:
-                    # Get pattern used to fill
-                    pattern = []
-                    for el in filled_c:
-                        if el == 10:
-                            pattern.append('A')
-                        elif el == 20:
-                            pattern.append('B')
-                        elif el == 30:
-                            pattern.append('C')
-                    final_sequence = [a, b, c], pattern
-                    break
-    return final_sequence
+    # A routine is made of whole (turn, steps) pairs
+    units = ["%s,%d" % (moves[i], moves[i + 1]) for i in range(0, len(moves) - 1, 2)]
+    compressor = MoveCompressor(units, n_routines=N_ROUTINES, max_size=MAX_ROUTINE_SIZE)
+    result = compressor.compress()
+    if result is None:
+        return None
+    routines, calls = result
+    pattern = [chr(ord('A') + idx) for idx in calls]
+    return routines, pattern
 
 
 def convert_sequence(sequence):
@@ -279,23 +194,21 @@ def convert_sequence(sequence):
 def alert_all_droids():
     space = get_space_configuration()
     moves = get_all_moves(space)
-    moves, sequence = split_moves(moves)
-    a, b, c = moves
+    routines, sequence = split_moves(moves)
+    # Unused routines are sent empty
+    routines += [[]] * (N_ROUTINES - len(routines))
     # Run
     optcode = read_input()
     optcode[0] = 2
-    interpreter = OptcodeInterpreter(optcode, quiet_mode=True)
+    interpreter = CompiledOptcodeInterpreter(optcode, quiet_mode=True)
     # Input sequence
     sequence_str = convert_sequence(sequence)
     for el in sequence_str:
         interpreter.input.put(ord(el))
     # Configure routines
-    for el in convert_sequence(a):
-        interpreter.input.put(ord(el))
-    for el in convert_sequence(b):
-        interpreter.input.put(ord(el))
-    for el in convert_sequence(c):
-        interpreter.input.put(ord(el))
+    for routine in routines:
+        for el in convert_sequence(routine):
+            interpreter.input.put(ord(el))
     interpreter.input.put(ord('n'))
     interpreter.input.put(ord('\n'))
     interpreter.run()
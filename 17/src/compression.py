@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Hash of a sequence of units modulo a Mersenne prime
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1000003
+
+
+class MoveCompressor:
+
+    """
+        Split a sequence of moves into a main routine calling at most
+        n_routines movement routines.
+
+        Units are the smallest pieces a routine is made of, e.g. "L,8".
+        Every routine and the main routine must fit in max_size characters
+        once written comma separated.
+        Repeated substrings are compared with rolling hashes over the units,
+        routines are searched depth first from the first uncovered unit,
+        and the positions that failed with a given set of routines are
+        memoized.
+
+        :units string array: moves to compress
+        :n_routines int: routines available
+        :max_size int: characters allowed in a routine
+    """
+    def __init__(self, units, n_routines=3, max_size=20):
+        self.units = list(units)
+        self.n_routines = n_routines
+        self.max_size = max_size
+        self.max_calls = (max_size + 1) // 2
+        ids = {}
+        self._ids = [ids.setdefault(unit, len(ids) + 1) for unit in self.units]
+        self._prefix = [0]
+        self._powers = [1]
+        for unit_id in self._ids:
+            self._prefix.append((self._prefix[-1] * HASH_BASE + unit_id) % HASH_MODULUS)
+            self._powers.append(self._powers[-1] * HASH_BASE % HASH_MODULUS)
+        self._failed = set()
+
+    def _hash(self, start, size):
+        end = start + size
+        return (self._prefix[end] - self._prefix[start] * self._powers[size]) % HASH_MODULUS
+
+    def _matches(self, routine, position):
+        start, size = routine
+        if position + size > len(self.units):
+            return False
+        if self._hash(start, size) != self._hash(position, size):
+            return False
+        return self._ids[start:start + size] == self._ids[position:position + size]
+
+    def _get_new_routines(self, position):
+        # Longest first, a routine must fit in max_size characters
+        sizes = []
+        length = -1
+        for size in range(1, len(self.units) - position + 1):
+            length += len(self.units[position + size - 1]) + 1
+            if length > self.max_size:
+                break
+            sizes.append(size)
+        return [(position, size) for size in reversed(sizes)]
+
+    def _search(self, position, routines, calls):
+        if position == len(self.units):
+            return routines, calls
+        if len(calls) == self.max_calls:
+            return None
+        # Routines with the same content are the same, wherever they were taken
+        key = (position, len(calls), tuple((self._hash(start, size), size) for start, size in routines))
+        if key in self._failed:
+            return None
+        for idx, routine in enumerate(routines):
+            if self._matches(routine, position):
+                result = self._search(position + routine[1], routines, calls + [idx])
+                if result is not None:
+                    return result
+        if len(routines) < self.n_routines:
+            for routine in self._get_new_routines(position):
+                result = self._search(position + routine[1], routines + (routine,), calls + [len(routines)])
+                if result is not None:
+                    return result
+        self._failed.add(key)
+        return None
+
+    """
+        Return the routines, as lists of units, and the main routine,
+        as a list of routine indexes. None if the moves cannot be compressed.
+    """
+    def compress(self):
+        result = self._search(0, (), [])
+        if result is None:
+            return None
+        routines, calls = result
+        return [self.units[start:start + size] for start, size in routines], calls
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+
+from intcode import CompiledOptcodeInterpreter
+
+
+class DroneSystem:
+
+    """
+        Deploy drones from a snapshot of the program taken when it first
+        asks for input, instead of reading, parsing and running its
+        prologue again for every point.
+    """
+    def __init__(self, optcode):
+        interpreter = CompiledOptcodeInterpreter(optcode, quiet_mode=True)
+        interpreter.run_until_blocked()
+        self.checkpoint = interpreter.snapshot()
+
+    def get_status(self, x, y):
+        interpreter = CompiledOptcodeInterpreter.from_snapshot(self.checkpoint, quiet_mode=True)
+        interpreter.input.put(x)
+        interpreter.input.put(y)
+        interpreter.run()
+        return interpreter.output.get()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .drone import DroneSystem
+
+CHUNK_SIZE = 256
+
+# Drone system of a worker process, loaded once by _init_worker
+_worker_drone_system = None
+
+
+def _init_worker(optcode):
+    global _worker_drone_system
+    _worker_drone_system = DroneSystem(optcode)
+
+
+def _scan_points(points):
+    return [_worker_drone_system.get_status(x, y) for x, y in points]
+
+
+class BeamScanner:
+
+    """
+        Evaluate the tractor beam on many points at once.
+        Points are split in chunks and sent to a pool of processes, each one
+        keeping its own drone system. Every result is cached, so a point is
+        never deployed twice.
+
+        :optcode int array: drone program
+        :workers int: number of processes, 1 to scan in this process
+        :chunk_size int: points sent to a worker at a time
+    """
+    def __init__(self, optcode, workers=None, chunk_size=CHUNK_SIZE):
+        self.optcode = optcode
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.drone_system = DroneSystem(optcode)
+        self._status = {}
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.optcode,))
+        return self._executor
+
+    def get_status(self, x, y):
+        point = (x, y)
+        status = self._status.get(point)
+        if status is None:
+            status = self.drone_system.get_status(x, y)
+            self._status[point] = status
+        return status
+
+    """
+        Return the status of every point, in the same order
+    """
+    def scan(self, points):
+        missing = list(dict.fromkeys(point for point in points if point not in self._status))
+        if self.workers <= 1 or len(missing) <= self.chunk_size:
+            for x, y in missing:
+                self.get_status(x, y)
+        else:
+            chunks = [missing[i:i + self.chunk_size] for i in range(0, len(missing), self.chunk_size)]
+            results = self._get_executor().map(_scan_points, chunks)
+            for chunk, statuses in zip(chunks, results):
+                for point, status in zip(chunk, statuses):
+                    self._status[point] = status
+        return [self._status[point] for point in points]
+
+    """
+        Return the beam over a region as a uint8 grid,
+        grid[i, j] being the status of (xs[i], ys[j])
+    """
+    def scan_region(self, xs, ys):
+        xs = list(xs)
+        ys = list(ys)
+        points = [(x, y) for x in xs for y in ys]
+        statuses = self.scan(points)
+        return np.array(statuses, dtype=np.uint8).reshape(len(xs), len(ys))
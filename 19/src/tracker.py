@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# Rounding makes each edge up to one point off a straight line
+EDGE_NOISE = 2
+
+
+class BeamTracker:
+
+    """
+        Track the edges of the tractor beam row by row.
+
+        The beam of a row x is a single run of points [left, right] and both
+        edges never move back when x grows, so each edge is found by galloping
+        from the closest known row and bisecting the last step.
+        Known edges are cached, every probe goes through the scanner cache.
+
+        :scanner BeamScanner: point evaluator
+    """
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self._rows = {}
+
+    def _is_beam(self, x, y):
+        return y >= 0 and self.scanner.get_status(x, y) == 1
+
+    def _get_closest_rows(self, x):
+        before = None
+        after = None
+        for row, edges in self._rows.items():
+            if edges is None or row == 0:
+                continue
+            if row < x and (before is None or row > before):
+                before = row
+            elif row > x and (after is None or row < after):
+                after = row
+        return before, after
+
+    def _find_inside(self, x, reference):
+        if reference is not None:
+            # The beam comes from the origin, scale the center of a known row
+            left, right = self._rows[reference]
+            center = int(round((left + right) / 2 * x / reference))
+            spread = max(2, (right - left) * x // reference)
+            for delta in range(spread + 1):
+                for y in (center - delta, center + delta):
+                    if self._is_beam(x, y):
+                        return y
+        # Nothing known nearby: walk the row from the axis
+        for y in range(10 * x + 10):
+            if self._is_beam(x, y):
+                return y
+        return None
+
+    def _gallop(self, x, start, step, inside, limit=None):
+        # Move from start by growing steps while the status is not inside,
+        # then bisect the last step: return the first y with status inside.
+        # limit, if given, is a point known to have status inside.
+        prev = start
+        if self._is_beam(x, start) == inside:
+            return start
+        size = 1
+        while True:
+            current = start + step * size
+            if limit is not None and (current - limit) * step > 0:
+                current = limit
+            if self._is_beam(x, current) == inside:
+                break
+            prev = current
+            size *= 2
+        low, high = sorted((prev, current))
+        # Status changes once between low and high
+        while high - low > 1:
+            middle = (low + high) // 2
+            if (self._is_beam(x, middle) == inside) == (step > 0):
+                high = middle
+            else:
+                low = middle
+        return high if step > 0 else low
+
+    """
+        Return the (left, right) edges of the beam in a row,
+        None if the row is empty
+    """
+    def get_row(self, x):
+        if x in self._rows:
+            return self._rows[x]
+        before, after = self._get_closest_rows(x)
+        reference = before if before is not None else after
+        inside = self._find_inside(x, reference)
+        if inside is None:
+            self._rows[x] = None
+            return None
+        # Left edge: first beam point, at or after the left edge of a previous row
+        low = self._rows[before][0] if before is not None else 0
+        if low < inside:
+            left = self._gallop(x, low, 1, True, limit=inside)
+        else:
+            left = self._gallop(x, inside, -1, False) + 1
+        # Right edge: last beam point, at or after the right edge of a previous row
+        high = self._rows[before][1] if before is not None else inside
+        high = max(high, inside)
+        right = self._gallop(x, high, 1, False) - 1
+        self._rows[x] = (left, right)
+        return left, right
+
+    """
+        Return how many points a square of the given size with its last row
+        at x has to spare on the right, negative if it does not fit
+    """
+    def get_square_slack(self, x, size):
+        top = x - (size - 1)
+        if top < 0:
+            return None
+        bottom_row = self.get_row(x)
+        top_row = self.get_row(top)
+        if bottom_row is None or top_row is None:
+            return None
+        left, _ = bottom_row
+        _, right = top_row
+        return right - (left + (size - 1))
+
+    def fits_square(self, x, size):
+        slack = self.get_square_slack(x, size)
+        return slack is not None and slack >= 0
+
+    """
+        Return the (x, y) corner closest to the emitter of the first
+        square of the given size that fits in the beam
+    """
+    def get_square_corner(self, size):
+        # Gallop over the rows, then bisect on the fitting condition
+        low = size - 1
+        high = low
+        step = size
+        while not self.fits_square(high, size):
+            low = high
+            high += step
+            step *= 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.fits_square(middle, size):
+                high = middle
+            else:
+                low = middle
+        # Rounding can make a few rows before the bisection point fit too:
+        # walk back until the slack is too short for the edge noise to matter
+        x = high - 1
+        while True:
+            slack = self.get_square_slack(x, size)
+            if slack is None or slack < -EDGE_NOISE:
+                break
+            if slack >= 0:
+                high = x
+            x -= 1
+        left, _ = self.get_row(high)
+        return high - (size - 1), left
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from intcode import Channel
+from intcode import OptcodeInterpreter
+from intcode.interpreter import split_code
+from intcode.operations import HALT
+from intcode.operations import InputRefused
+from intcode.operations import MODE_PARAMETER
+from intcode.operations import MODE_POSITION
+
+# Nouns sent to a worker at a time
+CHUNK_SIZE = 8
+
+# Symbolic values are (constant, noun factor, verb factor)
+NOUN = (0, 1, 0)
+VERB = (0, 0, 1)
+
+# Gravity assist program of a worker process, loaded once by _init_worker
+_worker_program = None
+
+
+def _init_worker(optcode):
+    global _worker_program
+    _worker_program = GravityAssistProgram(optcode)
+
+
+def _sweep_nouns(args):
+    nouns, verbs, target = args
+    return _worker_program.sweep(nouns, verbs, target)
+
+
+def _refuse_input():
+    raise InputRefused
+
+
+def _is_constant(value):
+    return value is not None and value[1] == 0 and value[2] == 0
+
+
+class NotAffine(Exception):
+
+    """
+        Raised when the output can not be traced symbolically
+    """
+    pass
+
+
+"""
+    Run the program on symbolic values and return what is left at address 0,
+    as (constant, noun factor, verb factor), None if it is not affine.
+
+    Only additions and multiplications are followed. A value read through
+    an address that depends on noun or verb, or the product of two symbolic
+    values, is unknown: the program usually overwrites it, otherwise the
+    result is unknown too. Executing an unknown instruction, writing through
+    an unknown address or out of the image and any other op code make the
+    trace give up.
+"""
+def trace_affine(optcode):
+    memory = [(value, 0, 0) for value in optcode]
+    if len(memory) < 3:
+        return None
+    memory[1] = NOUN
+    memory[2] = VERB
+
+    def get_constant(idx):
+        if idx < 0 or idx >= len(memory) or not _is_constant(memory[idx]):
+            raise NotAffine
+        return memory[idx][0]
+
+    def read(idx, mode):
+        if idx >= len(memory):
+            raise NotAffine
+        if mode == MODE_PARAMETER:
+            return memory[idx]
+        if mode != MODE_POSITION:
+            raise NotAffine
+        if not _is_constant(memory[idx]):
+            return None
+        address = memory[idx][0]
+        if address < 0 or address >= len(memory):
+            raise NotAffine
+        return memory[address]
+
+    try:
+        cursor = 0
+        while True:
+            op_code, modes = split_code(get_constant(cursor))
+            if op_code == HALT:
+                return memory[0]
+            if op_code not in (1, 2) or modes[2] != MODE_POSITION:
+                raise NotAffine
+            a = read(cursor + 1, modes[0])
+            b = read(cursor + 2, modes[1])
+            address = get_constant(cursor + 3)
+            if address < 0 or address >= len(memory):
+                raise NotAffine
+            if a is None or b is None:
+                value = None
+            elif op_code == 1:
+                value = (a[0] + b[0], a[1] + b[1], a[2] + b[2])
+            elif _is_constant(a):
+                value = (a[0] * b[0], a[0] * b[1], a[0] * b[2])
+            elif _is_constant(b):
+                value = (b[0] * a[0], b[0] * a[1], b[0] * a[2])
+            else:
+                value = None
+            memory[address] = value
+            cursor += 4
+    except NotAffine:
+        return None
+
+
+class GravityAssistProgram:
+
+    """
+        Run a program on many noun and verb pairs.
+        The program is parsed once, every run starts from a snapshot of it.
+        Each run executes the program once, with its own noun and verb:
+        the base interpreter is used, compiling would not pay off.
+
+        :optcode int array: program
+    """
+    def __init__(self, optcode):
+        interpreter = OptcodeInterpreter(optcode, Channel(), Channel(), quiet_mode=True)
+        self.size = len(optcode)
+        self.checkpoint = interpreter.snapshot()
+
+    """
+        Return the value left at address 0,
+        None if the program fails with these noun and verb
+    """
+    def run(self, noun, verb):
+        interpreter = OptcodeInterpreter.from_snapshot(self.checkpoint, Channel(), Channel(), quiet_mode=True)
+        interpreter.set_input_request_listener(_refuse_input)
+        interpreter.memory[1] = noun
+        interpreter.memory[2] = verb
+        try:
+            interpreter.run()
+        except (IndexError, NotImplementedError, InputRefused):
+            return None
+        return interpreter.memory[0]
+
+    """
+        Return every (noun, verb) pair giving the target
+    """
+    def sweep(self, nouns, verbs, target):
+        verbs = list(verbs)
+        return [(noun, verb) for noun in nouns for verb in verbs if self.run(noun, verb) == target]
+
+
+class NounVerbSolver:
+
+    """
+        Find the noun and verb pairs giving a target output.
+
+        The output is usually an affine function of noun and verb: the
+        program is run once on symbolic values to find it, see trace_affine,
+        and the target is solved for directly. Otherwise every pair is run,
+        with nouns split in chunks over a pool of processes.
+
+        :optcode int array: program
+        :nouns int range: nouns to try, every address of the program by default
+        :verbs int range: verbs to try, every address of the program by default
+        :workers int: number of processes, 1 to sweep in this process
+    """
+    def __init__(self, optcode, nouns=None, verbs=None, workers=None, chunk_size=CHUNK_SIZE):
+        self.optcode = optcode
+        self.program = GravityAssistProgram(optcode)
+        self.nouns = nouns if nouns is not None else range(len(optcode))
+        self.verbs = verbs if verbs is not None else range(len(optcode))
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self._affine = None
+        self._affine_checked = False
+
+    """
+        Return (constant, noun factor, verb factor) if the output is affine
+        in noun and verb, None otherwise
+    """
+    def get_affine(self):
+        if not self._affine_checked:
+            self._affine = trace_affine(self.optcode)
+            self._affine_checked = True
+        return self._affine
+
+    def _solve_affine(self, target):
+        constant, noun_factor, verb_factor = self.get_affine()
+        solutions = []
+        verbs = set(self.verbs)
+        for noun in self.nouns:
+            rest = target - constant - noun_factor * noun
+            if verb_factor == 0:
+                candidates = self.verbs if rest == 0 else []
+            elif rest % verb_factor == 0 and rest // verb_factor in verbs:
+                candidates = [rest // verb_factor]
+            else:
+                candidates = []
+            solutions += [(noun, verb) for verb in candidates]
+        return solutions
+
+    def _sweep(self, target):
+        nouns = list(self.nouns)
+        if self.workers <= 1 or len(nouns) <= self.chunk_size:
+            return self.program.sweep(nouns, self.verbs, target)
+        tasks = [(nouns[i:i + self.chunk_size], self.verbs, target)
+                 for i in range(0, len(nouns), self.chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.optcode,)) as executor:
+            results = executor.map(_sweep_nouns, tasks)
+            return [pair for pairs in results for pair in pairs]
+
+    """
+        Return every (noun, verb) pair giving the target, ordered by noun then verb
+    """
+    def solve(self, target):
+        if self.get_affine() is not None:
+            return self._solve_affine(target)
+        return self._sweep(target)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 
-from src.interpreter import OptcodeInterpreter
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import CompiledOptcodeInterpreter
+from src.springscript import HullSurvey
+
+WALK_HULLS_PATH = "walk.hulls"
+RUN_HULLS_PATH = "run.hulls"
 
 
 def read_input():
@@ -15,7 +22,7 @@ def read_input():
 
 def get_hull_damage(extended_mode=False):
     optcode = read_input()
-    interpreter = OptcodeInterpreter(optcode, ascii_mode=True, quiet_mode=True)
+    interpreter = CompiledOptcodeInterpreter(optcode, ascii_mode=True, quiet_mode=True)
 
     if not extended_mode:
         springscript = [
@@ -55,7 +62,40 @@ def get_hull_damage(extended_mode=False):
     return interpreter.output.get()
 
 
+def load_hulls(hulls_path):
+    if not os.path.exists(hulls_path):
+        return []
+    with open(hulls_path, "r") as hand:
+        return [line.strip() for line in hand if line.strip()]
+
+
+def save_hulls(hulls, hulls_path):
+    with open(hulls_path, "w") as hand:
+        for hull in hulls:
+            hand.write(hull + "\n")
+
+
+"""
+    Find a springscript instead of using the written one.
+    Hulls the droid fell on are recorded, so the next search starts from them.
+"""
+def search_hull_damage(extended_mode=False):
+    hulls_path = RUN_HULLS_PATH if extended_mode else WALK_HULLS_PATH
+    hulls = load_hulls(hulls_path)
+    survey = HullSurvey(read_input(), run_mode=extended_mode)
+    try:
+        hull_damage, springscript = survey.solve(hulls)
+    finally:
+        save_hulls(hulls, hulls_path)
+    print("\n".join(springscript))
+    return hull_damage
+
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        print("Hull damage", search_hull_damage())
+        print("Hull damage in extended mode", search_hull_damage(extended_mode=True))
+        sys.exit()
     hull_damage = get_hull_damage()
     print("Hull damage", hull_damage)
     hull_damage_ext = get_hull_damage(extended_mode=True)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+from itertools import combinations
+
+from intcode import CompiledOptcodeInterpreter
+
+OPERATIONS = ("AND", "OR", "NOT")
+WRITABLE = ("T", "J")
+WALK_SENSORS = "ABCD"
+RUN_SENSORS = "ABCDEFGHI"
+JUMP_LENGTH = 4
+
+GROUND = "#"
+HOLE = "."
+
+
+class SpringscriptError(Exception):
+    pass
+
+
+def parse_springscript(lines):
+    instructions = []
+    for line in lines:
+        parts = line.split()
+        if parts[0] in ("WALK", "RUN"):
+            break
+        if len(parts) != 3 or parts[0] not in OPERATIONS or parts[2] not in WRITABLE:
+            raise SpringscriptError("Invalid instruction %s" % line)
+        instructions.append(tuple(parts))
+    return instructions
+
+
+def format_springscript(instructions, run_mode=False):
+    return [" ".join(instruction) for instruction in instructions] + ["RUN" if run_mode else "WALK"]
+
+
+"""
+    Return the hull the droid fell on, read from the ascii output of a failed run
+"""
+def parse_failure(output):
+    for line in output.split("\n"):
+        if line and GROUND in line and set(line) <= {GROUND, HOLE}:
+            return line
+    return None
+
+
+class SpringDroid:
+
+    """
+        Springdroid simulated without Intcode.
+
+        The droid starts on the first tile of a hull and reads the sensors
+        A, B, ... for the tiles 1, 2, ... ahead, past the hull is ground.
+        On ground it runs the script and jumps JUMP_LENGTH tiles if J is
+        true, otherwise it steps one tile. It fails if it lands on a hole.
+
+        :run_mode boolean: true for the RUN sensors (A to I), false for WALK (A to D)
+    """
+    def __init__(self, run_mode=False):
+        self.sensors = RUN_SENSORS if run_mode else WALK_SENSORS
+
+    def get_sensor_index(self, hull, position):
+        index = 0
+        for n in range(len(self.sensors)):
+            tile = position + 1 + n
+            if tile >= len(hull) or hull[tile] == GROUND:
+                index |= 1 << n
+        return index
+
+    def evaluate(self, instructions, index):
+        registers = {"T": False, "J": False}
+        for n, sensor in enumerate(self.sensors):
+            registers[sensor] = bool(index >> n & 1)
+        for operation, x, y in instructions:
+            if operation == "AND":
+                registers[y] = registers[x] and registers[y]
+            elif operation == "OR":
+                registers[y] = registers[x] or registers[y]
+            else:
+                registers[y] = not registers[x]
+        return registers["J"]
+
+    """
+        Return the position where the droid falls, None if it crosses the hull.
+        jump(index) tells if the droid jumps for the given sensor index.
+    """
+    def walk(self, hull, jump):
+        position = 0
+        while position < len(hull):
+            if hull[position] == HOLE:
+                return position
+            if jump(self.get_sensor_index(hull, position)):
+                position += JUMP_LENGTH
+            else:
+                position += 1
+        return None
+
+    def crosses(self, instructions, hull):
+        return self.walk(hull, lambda index: self.evaluate(instructions, index)) is None
+
+
+"""
+    Return for every position of the hull, and past it, whether the droid
+    can still cross the hull from there
+"""
+def get_safe_positions(hull):
+    safe = [True] * (len(hull) + JUMP_LENGTH + 1)
+    for position in range(len(hull) - 1, -1, -1):
+        safe[position] = hull[position] == GROUND and (safe[position + 1] or safe[position + JUMP_LENGTH])
+    return safe
+
+
+class SpringscriptSearch:
+
+    """
+        Find springscripts crossing every recorded hull.
+
+        The search deepens over the sensors the script may read: for 0, 1, 2...
+        sensors, every subset on which some jump table crosses the hulls is
+        searched, and the shortest script of the first size with one is
+        returned. Subsets are checked by backtracking over the jump decisions,
+        which is cheap, so scripts are only searched on a few small tables.
+
+        On a subset, a script is only known by what it leaves in T and J for
+        the sensor readings of the positions the hulls can be crossed from,
+        each register being a bitmask over those readings. The search is a
+        breadth first enumeration of register states, run one level at a time
+        on every subset, so that no subset goes deeper than the shortest script.
+        Scripts are enumerated in a normal form: T is built by a chain of
+        instructions on the sensors and T, starting with NOT, then combined
+        into J once; J is only written when T is not being built. T is not
+        part of the state while it waits for its next chain.
+
+        :hulls string array: recorded hulls
+        :run_mode boolean: true for the RUN sensors
+        :max_length int: instructions allowed in a script
+        :max_states int: register states kept for a number of sensors, past it the search fails
+    """
+    def __init__(self, hulls, run_mode=False, max_length=15, max_states=3000000):
+        self.droid = SpringDroid(run_mode)
+        self.hulls = list(hulls)
+        self.max_length = max_length
+        self.max_states = max_states
+        self._safe = [get_safe_positions(hull) for hull in self.hulls]
+        self._readings = [[self.droid.get_sensor_index(hull, position) for position in range(len(hull))]
+                          for hull in self.hulls]
+        self._states = 0
+
+    """
+        Return True if a jump table on the given sensors crosses every hull
+    """
+    def _is_crossable(self, sensors):
+        mask = sum(1 << n for n in sensors)
+        table = {}
+        hulls = list(zip(self.hulls, self._safe, self._readings))
+
+        def walk(idx, position):
+            # Follow the table up to the first reading it does not know
+            while True:
+                if idx == len(hulls):
+                    return True
+                hull, safe, readings = hulls[idx]
+                if position >= len(hull):
+                    idx, position = idx + 1, 0
+                    continue
+                if not safe[position]:
+                    return False
+                key = readings[position] & mask
+                if key not in table:
+                    break
+                position += JUMP_LENGTH if table[key] else 1
+            for jump in (False, True):
+                table[key] = jump
+                if walk(idx, position + (JUMP_LENGTH if jump else 1)):
+                    return True
+                del table[key]
+            return False
+
+        return walk(0, 0)
+
+    """
+        Return the instructions allowed while T waits for a chain,
+        and while it is built
+    """
+    def _get_instructions(self, names):
+        free = [(operation, x, "J") for operation in OPERATIONS for x in names + ["J"]]
+        free += [("NOT", x, "T") for x in names]
+        chain = [(operation, x, "T") for operation in OPERATIONS for x in names + ["T"]]
+        chain += [(operation, "T", "J") for operation in OPERATIONS]
+        return free, chain
+
+    """
+        Breadth first search of scripts on the given sensors.
+        Yield None after every level, the script when one crosses every hull.
+    """
+    def _search_sensors(self, sensors):
+        mask = sum(1 << n for n in sensors)
+        keys = sorted({readings[position] & mask for readings, safe in zip(self._readings, self._safe)
+                       for position in range(len(readings)) if safe[position]})
+        bits = {key: bit for bit, key in enumerate(keys)}
+        full = (1 << len(keys)) - 1
+        names = [self.droid.sensors[n] for n in sensors]
+        sources = {self.droid.sensors[n]: sum(1 << bit for key, bit in bits.items() if key >> n & 1)
+                   for n in sensors}
+
+        def crosses(jump_mask):
+            for hull, readings in zip(self.hulls, self._readings):
+                position = 0
+                while position < len(hull):
+                    if hull[position] == HOLE:
+                        return False
+                    bit = bits.get(readings[position] & mask)
+                    position += JUMP_LENGTH if bit is not None and jump_mask >> bit & 1 else 1
+            return True
+
+        if crosses(0):
+            yield []
+            return
+        free, chain = self._get_instructions(names)
+        # T is None when it waits for a new chain
+        previous = {(None, 0): None, (0, 0): None}
+        frontier = list(previous)
+        for _ in range(self.max_length):
+            next_frontier = []
+            for state in frontier:
+                t, j = state
+                for instruction in (free if t is None else chain):
+                    operation, x, y = instruction
+                    value = sources.get(x, t if x == "T" else j)
+                    target = j if y == "J" else t or 0
+                    if operation == "AND":
+                        target &= value
+                    elif operation == "OR":
+                        target |= value
+                    else:
+                        target = ~value & full
+                    next_state = (None, target) if y == "J" else (target, j)
+                    if next_state in previous:
+                        continue
+                    previous[next_state] = (state, instruction)
+                    if y == "J" and crosses(target):
+                        script = []
+                        while previous[next_state] is not None:
+                            next_state, instruction = previous[next_state]
+                            script.append(instruction)
+                        yield script[::-1]
+                        return
+                    next_frontier.append(next_state)
+            self._states += len(next_frontier)
+            if self._states > self.max_states:
+                raise SpringscriptError("No springscript found within %d register states" % self.max_states)
+            frontier = next_frontier
+            yield None
+
+    """
+        Return the shortest script found, as instructions, None if there is none
+    """
+    def search(self):
+        n_sensors = len(self.droid.sensors)
+        for count in range(n_sensors + 1):
+            self._states = 0
+            searches = [self._search_sensors(sensors) for sensors in combinations(range(n_sensors), count)
+                        if self._is_crossable(sensors)]
+            while searches:
+                running = []
+                for search in searches:
+                    script = next(search, False)
+                    if script is None:
+                        running.append(search)
+                    elif script is not False:
+                        return script
+                searches = running
+        return None
+
+
+class HullSurvey:
+
+    """
+        Run springscripts on the real springdroid program.
+
+        :optcode int array: springdroid program
+        :run_mode boolean: true to RUN, false to WALK
+    """
+    def __init__(self, optcode, run_mode=False):
+        self.optcode = optcode
+        self.run_mode = run_mode
+
+    """
+        Return the hull damage, or the hull the droid fell on
+    """
+    def run(self, instructions):
+        interpreter = CompiledOptcodeInterpreter(self.optcode, quiet_mode=True)
+        for line in format_springscript(instructions, self.run_mode):
+            for el in line + "\n":
+                interpreter.input.put(ord(el))
+        interpreter.run()
+        output = []
+        while not interpreter.output.empty():
+            output.append(interpreter.output.get())
+        if output and output[-1] > 255:
+            return output[-1], None
+        return None, parse_failure("".join(map(chr, output)))
+
+    """
+        Search scripts on the hulls seen so far, confirm the candidate
+        on the real program and learn the hull it fails on, until one works.
+        Learned hulls are appended to the given list.
+        Raise SpringscriptError if no script crosses the known hulls.
+
+        :return hull damage and script
+    """
+    def solve(self, hulls=None, max_length=15):
+        hulls = hulls if hulls is not None else []
+        while True:
+            script = SpringscriptSearch(hulls, self.run_mode, max_length).search()
+            if script is None:
+                raise SpringscriptError("No springscript of %d instructions crosses the known hulls" % max_length)
+            damage, hull = self.run(script)
+            if damage is not None:
+                return damage, format_springscript(script, self.run_mode)
+            if hull is None or hull in hulls:
+                raise SpringscriptError("The droid failed on an unknown hull")
+            hulls.append(hull)
@@ -1,93 +1,114 @@
 #!/usr/bin/env python3
 
-from src.interpreter import OptcodeInterpreter
+import os
+import sys
 
-from time import sleep
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import Channel
+from intcode import CompiledOptcodeInterpreter
+
+NAT_ADDRESS = 255
+
+
+class NAT:
+
+    """
+        Network node at NAT_ADDRESS.
+        Keeps the last packet it receives and sends it to NIC 0 when the
+        network is idle, until it sends the same Y twice in a row.
+    """
+    def __init__(self):
+        self.packet = None
+        self.done = False
+        self._sent_y = None
+
+    def receive(self, x, y):
+        self.packet = (x, y)
+
+    """
+        Send the last packet to the given NIC.
+        Return False if no packet was received yet, nothing is sent then.
+    """
+    def wake_up(self, nic):
+        if self.packet is None:
+            return False
+        x, y = self.packet
+        nic.input.put(x)
+        nic.input.put(y)
+        if y == self._sent_y:
+            self.done = True
+        self._sent_y = y
+        return True
 
 
 class OptcodeNetwork:
 
+    """
+        Network of NICs run one after the other on a single thread.
+
+        Each NIC runs until it waits for input on an empty queue, packets are
+        routed as soon as they are sent. The network is idle when every NIC
+        started a round with an empty queue and no packet was sent in it.
+
+        :monitor_idle boolean: false to stop on the first packet sent to the NAT,
+            true to let the NAT wake the network up until it sends the same Y twice
+    """
     def __init__(self, monitor_idle=False):
         self.monitor_idle = monitor_idle
         self.network = []
-        self.nat_packet = [None, None]
+        self.nat = NAT()
         self._packets = []
+        self._sent = 0
         self._run = False
 
     def add_nic(self, optcode):
         address = len(self.network)
-        instructions = [code for code in optcode]
-        interpreter = OptcodeInterpreter(instructions, quiet_mode=True)
-
-        def on_input_requested():
-            if interpreter.input.empty():
-                interpreter.input.put(-1)
-                sleep(0.5)
-
-        interpreter.set_input_request_listener(on_input_requested)
+        interpreter = CompiledOptcodeInterpreter(optcode, input_queue=Channel(),
+                                                 output_queue=Channel(), quiet_mode=True)
 
         def on_output_sent(value):
             packet = self._packets[address]
-            if packet is None:
-                self._packets[address] = [value, None, None]
-            elif packet[1] is None:
-                packet[1] = value
-            else:
-                packet[2] = value
+            packet.append(value)
+            if len(packet) == 3:
                 target, x, y = packet
-                if target == 255:
+                if target == NAT_ADDRESS:
                     if not self.monitor_idle:
                         self._run = False
-                    self.nat_packet = [x, y]
+                    self.nat.receive(x, y)
                 else:
                     self.network[target].input.put(x)
                     self.network[target].input.put(y)
-                self._packets[address] = None
+                self._packets[address] = []
+                self._sent += 1
 
         interpreter.set_output_request_listener(on_output_sent)
         # Assign address
         interpreter.input.put(address)
         self.network.append(interpreter)
-        self._packets.append(None)
+        self._packets.append([])
+
+    def _run_round(self):
+        # Return True if the network was idle during the round
+        idle = True
+        sent = self._sent
+        for nic in self.network:
+            if not self._run:
+                break
+            if nic.input.empty():
+                nic.input.put(-1)
+            else:
+                idle = False
+            nic.run_until_blocked()
+        return idle and self._sent == sent
 
     def start(self):
         self._run = True
-        threads = []
-        for nic in self.network:
-            thread = nic.run_async()
-            threads.append(thread)
-        iteration = 0
-        prev_y_send = None
         while self._run:
-            all_idle = False
-            if self.monitor_idle:
-                # Check if network is idle
-                all_idle = True
-                if iteration < 10:
-                    all_idle = False
-                for i, nic in enumerate(self.network):
-                    if nic.input.qsize() <= 1 and nic.output.empty():
-                        is_idle = True
-                    else:
-                        is_idle = False
-                    all_idle = all_idle and is_idle
-                    if not all_idle:
-                        break
-            if all_idle:
-                input_queue = self.network[0].input
-                x, y = self.nat_packet
-                input_queue.put(x)
-                input_queue.put(y)
-                if y == prev_y_send:
+            if self._run_round() and self.monitor_idle:
+                self.nat.wake_up(self.network[0])
+                if self.nat.done:
                     self._run = False
-                prev_y_send = y
-                iteration = 0
-            iteration += 1
-            sleep(0.5)
-        # Stop all
-        for nic in self.network:
-            nic.input.put(-1)
-            nic.stop()
 
 
 def read_input():
@@ -104,7 +125,7 @@ def run_cat6(monitor_idle=False):
     for _ in range(50):
         nw.add_nic(optcode)
     nw.start()
-    return nw.nat_packet[1]
+    return nw.nat.packet[1]
 
 
 if __name__ == '__main__':
@@ -1,6 +1,17 @@
 #!/usr/bin/env python3
 
-from src.interpreter import OptcodeInterpreter
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intcode import CompiledOptcodeInterpreter
+from intcode import OptcodeTrace
+from intcode import replay_trace
+from src.adventure import AdventureDroid
+from src.adventure import ShipExplorer
+
+TRACE_PATH = "adventure.trace"
 
 
 def read_input():
@@ -11,9 +22,11 @@ def read_input():
     return optcode
 
 
-def explore():
+def explore(trace_path=TRACE_PATH):
     optcode = read_input()
-    interpreter = OptcodeInterpreter(optcode, ascii_mode=True)
+    interpreter = CompiledOptcodeInterpreter(optcode, ascii_mode=True)
+    trace = OptcodeTrace()
+    interpreter.set_trace(trace)
 
     def on_input_requested():
         if interpreter.input.empty():
@@ -39,36 +52,37 @@ Extra spaces or other characters aren't allowed - instructions must be provided
                         interpreter.input.put(el)
 
     interpreter.set_input_request_listener(on_input_requested)
-    interpreter.run()
+    try:
+        interpreter.run()
+    finally:
+        # Keep the session even if it is interrupted
+        trace.save(trace_path)
 
-"""
 
-    Security check     ==   Science Lab
-        ||                      ||
-        End                     Crew
-                                ||
-                                Holodom?
-                                 ||
-Escape pod == Engeneering  ==  Arcade               ??
-                                ||                    ||
-                              Corridor              Sick bay
-                                ||                    ||
-                              Warp Drive     ==      Hallway
-                                ||                    ||
-                               Hull  ==  [X]        Navigation
-                                ||                     ||
-               Passages  =   Storage                Chocolate factory
-                  ||
-                Stables
-
-Needed items:
-- antenna
-- astrolabe
-- space law space brochure
-- weather machine
+"""
+    Play a recorded session again, without reading the keyboard
+"""
+def replay(trace_path=TRACE_PATH):
+    interpreter = CompiledOptcodeInterpreter(read_input(), quiet_mode=True)
+    outputs = replay_trace(interpreter, OptcodeTrace.load(trace_path))
+    sys.stdout.write("".join(chr(n) if n < 255 else "%d\n" % n for n in outputs))
 
 
 """
+    Explore the ship without the keyboard and return the airlock password
+"""
+def compute():
+    explorer = ShipExplorer(AdventureDroid(read_input()))
+    password = explorer.solve()
+    print("Items:", ", ".join(sorted(explorer.inventory)))
+    print("Blocked items:", ", ".join(sorted(explorer.blocklist)))
+    return password
+
 
 if __name__ == "__main__":
-    explore()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        replay(*sys.argv[2:3])
+    elif len(sys.argv) > 1 and sys.argv[1] == "play":
+        explore()
+    else:
+        print("Password:", compute())
\ No newline at end of file
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+import re
+
+from collections import deque
+
+from intcode import CompiledOptcodeInterpreter
+
+REVERSE_DIRECTION = {
+    "north": "south",
+    "south": "north",
+    "east": "west",
+    "west": "east",
+}
+
+# A command printing more than this never gives control back
+MAX_OUTPUT = 20000
+
+ROOM_HEADER = re.compile(r"^== (.+) ==$", re.MULTILINE)
+PASSWORD = re.compile(r"typing (\d+) on the keypad")
+
+
+class ExplorationError(Exception):
+    pass
+
+
+class Room:
+
+    """
+        Room as described by the droid
+
+        :name string: room name
+        :doors string array: directions of the doors
+        :items string array: items on the floor
+    """
+    def __init__(self, name, doors, items):
+        self.name = name
+        self.doors = doors
+        self.items = items
+
+
+"""
+    Return every room described in the output, in order
+"""
+def parse_rooms(output):
+    headers = list(ROOM_HEADER.finditer(output))
+    rooms = []
+    for idx, header in enumerate(headers):
+        end = headers[idx + 1].start() if idx + 1 < len(headers) else len(output)
+        lists = {}
+        current = None
+        for line in output[header.end():end].split("\n"):
+            if line.endswith(":"):
+                current = lists.setdefault(line[:-1], [])
+            elif line.startswith("- ") and current is not None:
+                current.append(line[2:])
+            else:
+                current = None
+        rooms.append(Room(header.group(1), lists.get("Doors here lead", []), lists.get("Items here", [])))
+    return rooms
+
+
+class AdventureDroid:
+
+    """
+        Text adventure driven one command at a time, without threads.
+        Output goes through a listener so that a program looping on
+        output can be stopped.
+
+        :optcode int array: adventure program
+        :interpreter_class class: interpreter running the program
+    """
+    def __init__(self, optcode, interpreter_class=CompiledOptcodeInterpreter):
+        self.interpreter = interpreter_class(optcode, quiet_mode=True)
+        self.interpreter.set_output_request_listener(self._on_output)
+        self.halted = False
+        self.looping = False
+        self._output = []
+
+    def _on_output(self, n):
+        self._output.append(chr(n) if n < 255 else str(n))
+        if len(self._output) > MAX_OUTPUT:
+            self.looping = True
+            self.interpreter.stop()
+
+    """
+        Send a command, None to only start the program,
+        and return the output until the next command is needed
+    """
+    def send(self, command=None):
+        if self.halted or self.looping:
+            return ""
+        if command is not None:
+            for el in command + "\n":
+                self.interpreter.input.put(ord(el))
+        self._output = []
+        self.halted = self.interpreter.run_until_blocked()
+        return "".join(self._output)
+
+    def is_alive(self):
+        return not self.halted and not self.looping
+
+    def snapshot(self):
+        return self.interpreter.snapshot()
+
+    def restore(self, snapshot):
+        self.interpreter.restore(snapshot)
+        self.halted = False
+        self.looping = False
+
+
+class ShipExplorer:
+
+    """
+        Explore the ship, pick up every safe item and get through
+        the pressure-sensitive floor.
+
+        Doors that do not let the droid through are kept with no room
+        behind them and never tried again.
+        Items are tried on a snapshot: if taking one ends the game, never
+        gives control back or keeps the droid from moving, the snapshot is
+        restored and the item is blocked.
+        The floor only lets the droid through with the right weight, the
+        item subsets are walked in Gray code order so that every try is a
+        single take or drop.
+
+        :droid AdventureDroid: droid to drive
+        :blocklist string set: items never to take, extended as they fail
+    """
+    def __init__(self, droid, blocklist=None):
+        self.droid = droid
+        self.blocklist = blocklist if blocklist is not None else set()
+        self.rooms = {}
+        self.doors = {}
+        self.inventory = []
+        self.checkpoint = None
+        self.floor_direction = None
+        self.room = None
+
+    def _enter(self, output):
+        rooms = parse_rooms(output)
+        if not rooms:
+            return None
+        room = rooms[-1]
+        self.rooms.setdefault(room.name, room)
+        self.doors.setdefault(room.name, {})
+        return room
+
+    def _move(self, direction):
+        output = self.droid.send(direction)
+        room = self._enter(output)
+        if room is None:
+            return None
+        if room.name == self.room.name:
+            # Thrown back, the door leads to the floor
+            self.checkpoint = room.name
+            self.floor_direction = direction
+        else:
+            self.doors[self.room.name][direction] = room.name
+            self.doors[room.name][REVERSE_DIRECTION[direction]] = self.room.name
+        self.room = room
+        return output
+
+    """
+        Move through a door the droid already went through
+    """
+    def _walk(self, direction):
+        if self._move(direction) is None:
+            raise ExplorationError("The droid can not go %s from %s" % (direction, self.room.name))
+
+    """
+        Return True if the door may lead to another room:
+        not the floor of the checkpoint and not a blocked door
+    """
+    def _is_open(self, direction):
+        if self.room.name == self.checkpoint and direction == self.floor_direction:
+            return False
+        return self.doors[self.room.name].get(direction, "") is not None
+
+    def _is_safe(self, item):
+        output = self.droid.send("take %s" % item)
+        if not self.droid.is_alive() or ("You take the %s." % item) not in output:
+            return False
+        # Step out and back through a door known to lead out, to check the droid can still move
+        room = self.room
+        directions = [direction for direction, name in self.doors[room.name].items()
+                      if name is not None and self._is_open(direction)]
+        if not directions:
+            return True
+        direction = directions[0]
+        for step in (direction, REVERSE_DIRECTION[direction]):
+            rooms = parse_rooms(self.droid.send(step))
+            if not self.droid.is_alive() or not rooms:
+                return False
+        if rooms[-1].name != room.name:
+            return False
+        self.room = room
+        return True
+
+    def _collect(self):
+        for item in self.room.items:
+            if item in self.blocklist:
+                continue
+            snapshot = self.droid.snapshot()
+            if self._is_safe(item):
+                self.inventory.append(item)
+            else:
+                self.droid.restore(snapshot)
+                self.blocklist.add(item)
+
+    """
+        Visit every room depth first, collecting the items on the way
+    """
+    def explore(self):
+        self.room = self._enter(self.droid.send())
+        if self.room is None:
+            raise ExplorationError("The droid is not in a room")
+        path = []
+        visited = {self.room.name}
+        collected = set()
+        while True:
+            if self.room.name not in collected and any(self.doors[self.room.name].values()):
+                # Items are tried once a door is known to lead out
+                self._collect()
+                collected.add(self.room.name)
+            move = None
+            for direction in self.room.doors:
+                if self._is_open(direction) and direction not in self.doors[self.room.name]:
+                    move = direction
+                    break
+            if move is not None:
+                start = self.room.name
+                if self._move(move) is None:
+                    if not self.droid.is_alive():
+                        raise ExplorationError("The droid stopped going %s from %s" % (move, start))
+                    # The door did not let the droid through
+                    self.doors[start][move] = None
+                    continue
+                if self.room.name == start:
+                    continue
+                if self.room.name in visited:
+                    # Known room by another door, go back
+                    self._walk(REVERSE_DIRECTION[move])
+                    continue
+                visited.add(self.room.name)
+                path.append(move)
+            elif path:
+                self._walk(REVERSE_DIRECTION[path.pop()])
+            else:
+                if self.room.name not in collected:
+                    self._collect()
+                return
+
+    def get_path(self, start, target):
+        previous = {start: None}
+        pending = deque([start])
+        while pending:
+            name = pending.popleft()
+            if name == target:
+                directions = []
+                while previous[name] is not None:
+                    direction, name = previous[name]
+                    directions.append(direction)
+                return directions[::-1]
+            for direction, neighbour in self.doors[name].items():
+                if neighbour is not None and neighbour not in previous:
+                    previous[neighbour] = (direction, name)
+                    pending.append(neighbour)
+        return None
+
+    """
+        Try the item subsets on the floor, starting with every item taken.
+
+        :return the airlock password, None if no subset works
+    """
+    def pass_floor(self):
+        if self.checkpoint is None:
+            return None
+        for direction in self.get_path(self.room.name, self.checkpoint):
+            self._walk(direction)
+        held = [True] * len(self.inventory)
+        for step in range(1 << len(self.inventory)):
+            if step > 0:
+                # Gray code: flip the item of the lowest set bit
+                idx = (step & -step).bit_length() - 1
+                item = self.inventory[idx]
+                self.droid.send(("drop %s" if held[idx] else "take %s") % item)
+                held[idx] = not held[idx]
+            output = self.droid.send(self.floor_direction)
+            password = PASSWORD.search(output)
+            if password is not None:
+                return int(password.group(1))
+            if not self.droid.is_alive():
+                return None
+        return None
+
+    def solve(self):
+        self.explore()
+        return self.pass_floor()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from intcode import Channel
+from intcode import CompiledOptcodeInterpreter
+
+# Amplifier chain of a worker process, loaded once by _init_worker
+_worker_chain = None
+
+
+def _init_worker(optcode, feedback):
+    global _worker_chain
+    _worker_chain = AmplifierChain(optcode, feedback=feedback)
+
+
+def _search_prefix(args):
+    phases, prefix = args
+    return _worker_chain.search(phases, prefix)
+
+
+class AmplifierChain:
+
+    """
+        Amplifiers running the same program, started from a snapshot
+        of the loaded program instead of parsing it for each of them.
+
+        :optcode int array: amplifier program
+        :feedback boolean: true if the last amplifier is connected back to the first one
+    """
+    def __init__(self, optcode, feedback=False):
+        self.feedback = feedback
+        interpreter = CompiledOptcodeInterpreter(optcode, Channel(), Channel(), quiet_mode=True)
+        self.checkpoint = interpreter.snapshot()
+
+    def _amplify(self, amplifier, signal):
+        amplifier.input.put(signal)
+        halted = amplifier.run_until_blocked()
+        return amplifier.output.get(), halted
+
+    def _start(self, phase, signal):
+        amplifier = CompiledOptcodeInterpreter.from_snapshot(self.checkpoint, Channel(), Channel(),
+                                                             quiet_mode=True)
+        amplifier.input.put(phase)
+        return (amplifier,) + self._amplify(amplifier, signal)
+
+    def _close_loop(self, amplifiers, signal, halted):
+        while self.feedback and not halted:
+            for amplifier in amplifiers:
+                signal, halted = self._amplify(amplifier, signal)
+        return signal
+
+    """
+        Return the signal sent to the thrusters
+    """
+    def run(self, phases, signal=0):
+        amplifiers = []
+        halted = False
+        for phase in phases:
+            amplifier, signal, halted = self._start(phase, signal)
+            amplifiers.append(amplifier)
+        return self._close_loop(amplifiers, signal, halted)
+
+    """
+        Return the highest signal over every order of the phases starting
+        with the given prefix, and the order giving it.
+        Orders are visited depth first: the amplifiers of a common prefix
+        are run once and shared by every order starting with it.
+    """
+    def search(self, phases, prefix=()):
+        amplifiers = []
+        signal = 0
+        halted = False
+        for phase in prefix:
+            amplifier, signal, halted = self._start(phase, signal)
+            amplifiers.append(amplifier)
+        remaining = [phase for phase in phases if phase not in prefix]
+        if not remaining:
+            return self._close_loop(amplifiers, signal, halted), tuple(prefix)
+        return self._search(remaining, tuple(prefix), amplifiers, signal)
+
+    def _search(self, remaining, order, amplifiers, signal):
+        best = None
+        for phase in remaining:
+            amplifier, output, halted = self._start(phase, signal)
+            next_order = order + (phase,)
+            if len(remaining) == 1:
+                # The prefix amplifiers are shared with the other orders
+                chain = [prefix_amplifier.fork() for prefix_amplifier in amplifiers] if self.feedback else []
+                result = (self._close_loop(chain + [amplifier], output, halted), next_order)
+            else:
+                next_remaining = [other for other in remaining if other != phase]
+                result = self._search(next_remaining, next_order, amplifiers + [amplifier], output)
+            if best is None or result > best:
+                best = result
+        return best
+
+
+class PhaseSearch:
+
+    """
+        Find the phase settings giving the highest thruster signal.
+        Orders are split by their first phase and searched in a pool
+        of processes, each one keeping its own amplifier chain.
+
+        :optcode int array: amplifier program
+        :feedback boolean: true for amplifiers in a feedback loop
+        :workers int: number of processes, 1 to search in this process
+    """
+    def __init__(self, optcode, feedback=False, workers=None):
+        self.optcode = optcode
+        self.feedback = feedback
+        self.workers = workers if workers is not None else os.cpu_count()
+
+    """
+        Return the highest signal and the phase settings giving it
+    """
+    def search(self, phases):
+        phases = list(phases)
+        tasks = [(phases, (phase,)) for phase in phases]
+        if self.workers <= 1 or len(phases) <= 1:
+            chain = AmplifierChain(self.optcode, feedback=self.feedback)
+            results = [chain.search(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)),
+                                     initializer=_init_worker,
+                                     initargs=(self.optcode, self.feedback)) as executor:
+                results = list(executor.map(_search_prefix, tasks))
+        signal, order = max(results)
+        return signal, list(order)
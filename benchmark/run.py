@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+    Benchmark the Intcode backends on every Intcode day.
+
+    Program images are read from benchmark/images/<day>, pinned with --pin
+    from the <day>/input files, and checked against images/SHA256SUMS.
+    Each measure runs in a fresh process, so that the peak RSS is its own.
+
+    Usage: run.py [--pin] [--days 9 13] [--backends base compiled] [--repeat 3] [--trace-malloc]
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from concurrent.futures import ProcessPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+IMAGES_DIR = os.path.join(BENCHMARK_DIR, "images")
+CHECKSUMS = os.path.join(IMAGES_DIR, "SHA256SUMS")
+
+sys.path.append(ROOT_DIR)
+sys.path.append(BENCHMARK_DIR)
+
+from workloads import BACKENDS
+from workloads import WORKLOADS
+from workloads import CountingOptcodeInterpreter
+
+
+def read_checksums():
+    checksums = {}
+    if os.path.exists(CHECKSUMS):
+        with open(CHECKSUMS, "r") as hand:
+            for line in hand:
+                checksum, name = line.split()
+                checksums[name] = checksum
+    return checksums
+
+
+def pin_images(days):
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    checksums = read_checksums()
+    for day in days:
+        path = os.path.join(ROOT_DIR, str(day), "input")
+        if not os.path.exists(path):
+            print("Day %d: no input to pin" % day)
+            continue
+        with open(path, "rb") as hand:
+            raw = hand.read()
+        with open(os.path.join(IMAGES_DIR, str(day)), "wb") as hand:
+            hand.write(raw)
+        checksums[str(day)] = hashlib.sha256(raw).hexdigest()
+        print("Day %d: pinned" % day)
+    with open(CHECKSUMS, "w") as hand:
+        for name in sorted(checksums, key=int):
+            hand.write("%s  %s\n" % (checksums[name], name))
+
+
+def read_image(day):
+    path = os.path.join(IMAGES_DIR, str(day))
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as hand:
+        raw = hand.read()
+    checksum = read_checksums().get(str(day))
+    if checksum != hashlib.sha256(raw).hexdigest():
+        raise ValueError("Image of day %d does not match its pinned checksum" % day)
+    return list(map(lambda el: int(el), raw.decode().split(",")))
+
+
+def count_instructions(day, optcode):
+    CountingOptcodeInterpreter.executed = 0
+    result = WORKLOADS[day](CountingOptcodeInterpreter, optcode)
+    return CountingOptcodeInterpreter.executed, result
+
+
+def measure(day, backend, optcode, repeat, trace_malloc):
+    workload = WORKLOADS[day]
+    interpreter_class = BACKENDS[backend]
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = workload(interpreter_class, optcode)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    traced = None
+    if trace_malloc:
+        tracemalloc.start()
+        workload(interpreter_class, optcode)
+        _, peak = tracemalloc.get_traced_memory()
+        # Blocks the run left allocated: caches and anything it leaked
+        kept = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        traced = (peak, kept)
+    return best, peak_rss, traced, result
+
+
+def run_isolated(function, *args):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(function, *args).result()
+
+
+def run_benchmarks(days, backends, repeat, trace_malloc):
+    header = "%4s  %-9s %12s %10s %14s %10s" % ("day", "backend", "instructions", "time (s)", "instructions/s", "RSS (KiB)")
+    if trace_malloc:
+        header += " %12s %12s" % ("peak B/instr", "kept blocks")
+    print(header)
+    for day in days:
+        optcode = read_image(day)
+        if optcode is None:
+            print("%4d  no pinned image" % day)
+            continue
+        instructions, expected = run_isolated(count_instructions, day, optcode)
+        for backend in backends:
+            elapsed, peak_rss, traced, result = run_isolated(measure, day, backend, optcode, repeat, trace_malloc)
+            line = "%4d  %-9s %12d %10.3f %14.0f %10d" % (day, backend, instructions, elapsed,
+                                                        instructions / elapsed, peak_rss)
+            if trace_malloc:
+                peak, kept = traced
+                line += " %12.2f %12d" % (peak / instructions, kept)
+            if result != expected:
+                line += "  result differs: %s != %s" % (result, expected)
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Intcode backends")
+    parser.add_argument("--pin", action="store_true", help="pin the <day>/input files as images")
+    parser.add_argument("--days", type=int, nargs="+", default=sorted(WORKLOADS))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trace-malloc", action="store_true",
+                        help="report the peak traced memory per instruction and the blocks left allocated (slower)")
+    args = parser.parse_args()
+    if args.pin:
+        pin_images(args.days)
+    else:
+        run_benchmarks(args.days, args.backends, args.repeat, args.trace_malloc)
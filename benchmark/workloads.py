@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+    Deterministic workloads for every Intcode day.
+
+    Each workload runs a puzzle program with scripted input, on the given
+    interpreter class, and returns a result that must not depend on the class.
+"""
+
+import importlib.util
+import os
+
+from itertools import permutations
+
+from intcode import Channel
+from intcode import CompiledOptcodeInterpreter
+from intcode import OptcodeInterpreter
+from intcode.compiler import HandlerTable
+from intcode.compiler import InstructionCompiler
+
+DIRECTIONS = {1: (0, 1), 2: (0, -1), 3: (-1, 0), 4: (1, 0)}
+REVERSE = {1: 2, 2: 1, 3: 4, 4: 3}
+
+WALK_SCRIPT = ["NOT A J", "NOT B T", "AND D T", "OR T J", "NOT C T", "AND D T", "OR T J", "WALK"]
+RUN_SCRIPT = ["NOT C J", "AND D J", "AND H J", "NOT B T", "AND D T", "OR T J", "NOT A T", "OR T J", "RUN"]
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CountingOptcodeInterpreter(OptcodeInterpreter):
+
+    """
+        Interpreter counting the instructions it dispatches, in every instance
+    """
+    executed = 0
+
+    def get_operation(self):
+        CountingOptcodeInterpreter.executed += 1
+        return super().get_operation()
+
+
+class UnfusedOptcodeInterpreter(CompiledOptcodeInterpreter):
+
+    """
+        Compiled interpreter with one handler per instruction
+    """
+    def set_memory(self, memory):
+        OptcodeInterpreter.set_memory(self, memory)
+        self.memory.instructions = HandlerTable(InstructionCompiler(self, max_fused=1))
+
+
+BACKENDS = {
+    "base": OptcodeInterpreter,
+    "compiled": CompiledOptcodeInterpreter,
+    "unfused": UnfusedOptcodeInterpreter,
+}
+
+
+def start(interpreter_class, optcode, *inputs, **kwargs):
+    interpreter = interpreter_class(optcode, Channel(), Channel(), quiet_mode=True, **kwargs)
+    for value in inputs:
+        interpreter.input.put(value)
+    return interpreter
+
+
+def drain(interpreter):
+    values = []
+    while not interpreter.output.empty():
+        values.append(interpreter.output.get())
+    return values
+
+
+def run_day2(interpreter_class, optcode):
+    results = []
+    for noun in range(20):
+        for verb in range(20):
+            interpreter = start(interpreter_class, optcode)
+            interpreter.memory[1] = noun
+            interpreter.memory[2] = verb
+            interpreter.run()
+            results.append(interpreter.memory[0])
+    return sum(results)
+
+
+def run_day5(interpreter_class, optcode):
+    results = []
+    for system in (1, 5):
+        interpreter = start(interpreter_class, optcode, system)
+        interpreter.run()
+        results.append(drain(interpreter)[-1])
+    return results
+
+
+def run_amplifiers(interpreter_class, optcode, phases):
+    amplifiers = [start(interpreter_class, optcode, phase) for phase in phases]
+    signal = 0
+    halted = False
+    while not halted:
+        for amplifier in amplifiers:
+            amplifier.input.put(signal)
+            halted = amplifier.run_until_blocked()
+            signal = amplifier.output.get()
+    return signal
+
+
+def run_day7(interpreter_class, optcode):
+    return [max(run_amplifiers(interpreter_class, optcode, phases) for phases in permutations(settings))
+            for settings in (range(5), range(5, 10))]
+
+
+def run_day9(interpreter_class, optcode):
+    results = []
+    for mode in (1, 2):
+        interpreter = start(interpreter_class, optcode, mode)
+        interpreter.run()
+        results.append(drain(interpreter))
+    return results
+
+
+def run_day11(interpreter_class, optcode):
+    interpreter = start(interpreter_class, optcode)
+    hull = {(0, 0): 1}
+    position = (0, 0)
+    dx, dy = 0, 1
+    while not interpreter.run_until_blocked():
+        interpreter.input.put(hull.get(position, 0))
+        interpreter.run_until_blocked()
+        color, turn = drain(interpreter)
+        hull[position] = color
+        dx, dy = (dy, -dx) if turn == 1 else (-dy, dx)
+        position = (position[0] + dx, position[1] + dy)
+    return len(hull), sum(hull.values())
+
+
+def run_day13(interpreter_class, optcode):
+    interpreter = start(interpreter_class, optcode)
+    interpreter.memory[0] = 2
+    state = {"ball": 0, "paddle": 0, "score": 0}
+
+    def read_screen():
+        values = drain(interpreter)
+        for n in range(0, len(values), 3):
+            x, y, tile = values[n:n + 3]
+            if x == -1 and y == 0:
+                state["score"] = tile
+            elif tile == 3:
+                state["paddle"] = x
+            elif tile == 4:
+                state["ball"] = x
+
+    def on_input_requested():
+        read_screen()
+        ball, paddle = state["ball"], state["paddle"]
+        interpreter.input.put((ball > paddle) - (ball < paddle))
+
+    interpreter.set_input_request_listener(on_input_requested)
+    interpreter.run()
+    read_screen()
+    return state["score"]
+
+
+def run_day15(interpreter_class, optcode):
+    droid = start(interpreter_class, optcode)
+    position = (0, 0)
+    seen = {position}
+    oxygen = None
+    path = []
+
+    def step(move):
+        droid.input.put(move)
+        droid.run_until_blocked()
+        return droid.output.get()
+
+    while True:
+        for move, (dx, dy) in DIRECTIONS.items():
+            point = (position[0] + dx, position[1] + dy)
+            if point in seen:
+                continue
+            seen.add(point)
+            status = step(move)
+            if status != 0:
+                path.append(move)
+                position = point
+                if status == 2:
+                    oxygen = point
+                break
+        else:
+            if not path:
+                break
+            move = REVERSE[path.pop()]
+            step(move)
+            dx, dy = DIRECTIONS[move]
+            position = (position[0] + dx, position[1] + dy)
+    return len(seen), oxygen
+
+
+def run_day17(interpreter_class, optcode):
+    interpreter = start(interpreter_class, optcode)
+    interpreter.run()
+    return drain(interpreter).count(ord("#"))
+
+
+def run_day19(interpreter_class, optcode):
+    checkpoint = start(interpreter_class, optcode).snapshot()
+    points = 0
+    for x in range(50):
+        for y in range(50):
+            drone = interpreter_class.from_snapshot(checkpoint, Channel(), Channel(), quiet_mode=True)
+            drone.input.put(x)
+            drone.input.put(y)
+            drone.run()
+            points += drone.output.get()
+    return points
+
+
+def run_day21(interpreter_class, optcode):
+    results = []
+    for script in (WALK_SCRIPT, RUN_SCRIPT):
+        interpreter = start(interpreter_class, optcode, *"".join(line + "\n" for line in script),
+                            ascii_mode=True)
+        interpreter.run()
+        results.append(drain(interpreter))
+    return results
+
+
+def run_day23(interpreter_class, optcode):
+    network = [start(interpreter_class, optcode, address) for address in range(50)]
+    first_nat = None
+    nat = None
+    previous_y = None
+    while True:
+        idle = True
+        for nic in network:
+            if nic.input.empty():
+                nic.input.put(-1)
+            else:
+                idle = False
+            nic.run_until_blocked()
+            packets = drain(nic)
+            for n in range(0, len(packets), 3):
+                idle = False
+                target, x, y = packets[n:n + 3]
+                if target == 255:
+                    nat = (x, y)
+                    if first_nat is None:
+                        first_nat = y
+                else:
+                    network[target].input.put(x)
+                    network[target].input.put(y)
+        if idle and nat is not None:
+            if nat[1] == previous_y:
+                return first_nat, previous_y
+            previous_y = nat[1]
+            network[0].input.put(nat[0])
+            network[0].input.put(nat[1])
+
+
+def load_module(day, name):
+    # Every day keeps its helpers in a package named src, load the file itself
+    path = os.path.join(ROOT_DIR, str(day), "src", "%s.py" % name)
+    spec = importlib.util.spec_from_file_location("day%d_%s" % (day, name), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_day25(interpreter_class, optcode):
+    adventure = load_module(25, "adventure")
+    explorer = adventure.ShipExplorer(adventure.AdventureDroid(optcode, interpreter_class))
+    password = explorer.solve()
+    if password is None:
+        raise ValueError("No password found, blocked items: %s" % sorted(explorer.blocklist))
+    return password
+
+
+WORKLOADS = {
+    2: run_day2,
+    5: run_day5,
+    7: run_day7,
+    9: run_day9,
+    11: run_day11,
+    13: run_day13,
+    15: run_day15,
+    17: run_day17,
+    19: run_day19,
+    21: run_day21,
+    23: run_day23,
+    25: run_day25,
+}
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+
+from .channel import Channel
+from .interpreter import OptcodeInterpreter
+from .interpreter import Amplifier
+from .compiler import CompiledOptcodeInterpreter
+from .analysis import ProgramAnalysis
+from .analysis import analyze
+from .profiler import OptcodeProfiler
+from .trace import OptcodeTrace
+from .trace import TraceMismatch
+from .trace import replay_trace
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_right
+
+from .interpreter import split_code
+from .operations import HALT
+from .operations import MODE_PARAMETER
+from .operations import MODE_POSITION
+from .operations import OPERATIONS
+
+
+def is_writing(op_code):
+    operation = OPERATIONS.get(op_code)
+    return operation is not None and operation.writes
+
+
+class StaticInstruction:
+
+    """
+        Instruction decoded from the program image
+
+        :cursor int: address of the instruction
+        :op_code int: op code, HALT for halt
+        :modes int array: parameter modes
+        :values int array: raw parameter values
+    """
+    def __init__(self, cursor, op_code, modes, values):
+        self.cursor = cursor
+        self.op_code = op_code
+        self.modes = modes[:len(values)]
+        self.values = values
+        self.size = 1 + len(values)
+
+    def __str__(self):
+        parameters = []
+        for value, mode in zip(self.values, self.modes):
+            if mode == MODE_POSITION:
+                parameters.append("[%d]" % value)
+            elif mode == MODE_PARAMETER:
+                parameters.append("%d" % value)
+            else:
+                parameters.append("[rb%+d]" % value)
+        name = OPERATIONS[self.op_code].__name__ if self.op_code in OPERATIONS else "Halt"
+        return ("%5d: %s %s" % (self.cursor, name, ", ".join(parameters))).rstrip()
+
+    def is_jump(self):
+        return self.op_code in (5, 6)
+
+    """
+        Return True if the jump is always taken, False if never,
+        None if it depends on the memory
+    """
+    def jump_taken(self):
+        if self.modes[0] != MODE_PARAMETER:
+            return None
+        return (self.values[0] != 0) == (self.op_code == 5)
+
+    """
+        Return the jump target, None if it is only known at run time
+    """
+    def get_target(self):
+        if self.modes[1] == MODE_PARAMETER:
+            return self.values[1]
+        return None
+
+    """
+        Return the address written, None if it is relative or there is no write
+    """
+    def get_write_address(self):
+        if is_writing(self.op_code) and self.modes[-1] == MODE_POSITION:
+            return self.values[-1]
+        return None
+
+    """
+        Return the constant stored by this instruction if it only moves
+        an immediate value (add 0 or multiply by 1), None otherwise
+    """
+    def get_stored_constant(self):
+        if self.op_code not in (1, 2) or self.modes[0] != MODE_PARAMETER or self.modes[1] != MODE_PARAMETER:
+            return None
+        a, b = self.values[0], self.values[1]
+        neutral = 0 if self.op_code == 1 else 1
+        if a == neutral:
+            return b
+        if b == neutral:
+            return a
+        return None
+
+
+class BasicBlock:
+
+    """
+        Straight-line sequence of instructions with a single entry
+
+        :instructions StaticInstruction array: instructions in order
+        :successors int array: start of the blocks that can follow
+        :indirect boolean: true if the block ends with a jump only known at run time
+    """
+    def __init__(self, instructions):
+        self.instructions = instructions
+        self.start = instructions[0].cursor
+        self.end = instructions[-1].cursor + instructions[-1].size
+        self.successors = []
+        self.indirect = False
+
+    def __str__(self):
+        lines = ["block %d-%d -> %s%s" % (self.start, self.end, self.successors,
+                                           " + indirect" if self.indirect else "")]
+        lines += ["  " + str(instruction) for instruction in self.instructions]
+        return "\n".join(lines)
+
+
+def decode_instruction(image, cursor):
+    if cursor < 0 or cursor >= len(image):
+        return None
+    op_code, modes = split_code(image[cursor])
+    if op_code == HALT:
+        return StaticInstruction(cursor, op_code, modes, [])
+    operation = OPERATIONS.get(op_code)
+    if operation is None or cursor + operation.n_parameters >= len(image):
+        return None
+    n_parameters = operation.n_parameters
+    if max(modes[:n_parameters]) > 2:
+        return None
+    if operation.writes and modes[n_parameters - 1] == MODE_PARAMETER:
+        return None
+    values = list(image[cursor + 1:cursor + 1 + n_parameters])
+    return StaticInstruction(cursor, op_code, modes, values)
+
+
+class ProgramAnalysis:
+
+    """
+        Static analysis of a program image.
+
+        Instructions are decoded from address 0 following the control flow.
+        Jumps with an immediate target are followed, jumps whose target is
+        read from memory (function returns) make the block indirect: their
+        targets are guessed from the constants the program stores, which is
+        how return addresses are pushed. Cells of a decoded instruction are
+        code, every other cell of the image is data.
+        Code is safe to decode once if no write can land on it: see
+        is_self_modifying.
+
+        :optcode int array: program image
+    """
+    def __init__(self, optcode):
+        self.image = optcode
+        self.instructions = {}
+        self.blocks = {}
+        self.code_cells = set()
+        self.written_cells = set()
+        self.relative_writes = False
+        self.indirect_jumps = False
+        self._decode()
+        self._build_blocks()
+
+    def _decode_from(self, entries, leaders, required=False):
+        pending = list(entries)
+        while pending:
+            cursor = pending.pop()
+            if cursor in self.instructions:
+                continue
+            instruction = decode_instruction(self.image, cursor)
+            if instruction is None:
+                if required:
+                    raise ValueError("Invalid instruction at %d" % cursor)
+                continue
+            required = False
+            self.instructions[cursor] = instruction
+            next_cursor = cursor + instruction.size
+            if instruction.op_code == HALT:
+                leaders.add(next_cursor)
+                continue
+            if instruction.is_jump():
+                taken = instruction.jump_taken()
+                target = instruction.get_target()
+                leaders.add(next_cursor)
+                if taken is not False:
+                    if target is None:
+                        self.indirect_jumps = True
+                    else:
+                        leaders.add(target)
+                        pending.append(target)
+                if taken is True:
+                    continue
+            pending.append(next_cursor)
+
+    def _decode(self):
+        leaders = {0}
+        self._decode_from([0], leaders, required=True)
+        if self.indirect_jumps:
+            # Return addresses are stored as constants before the call
+            candidates = set()
+            for instruction in list(self.instructions.values()):
+                constant = instruction.get_stored_constant()
+                if constant is not None and constant not in self.instructions:
+                    candidates.add(constant)
+            for candidate in sorted(candidates):
+                if candidate in self.instructions or not self._is_free(candidate):
+                    continue
+                known = len(self.instructions)
+                self._decode_from([candidate], leaders)
+                if len(self.instructions) > known:
+                    leaders.add(candidate)
+        for instruction in self.instructions.values():
+            self.code_cells.update(range(instruction.cursor, instruction.cursor + instruction.size))
+            address = instruction.get_write_address()
+            if address is not None:
+                self.written_cells.add(address)
+            elif is_writing(instruction.op_code):
+                self.relative_writes = True
+        self.leaders = leaders
+
+    def _is_free(self, cursor):
+        # A candidate inside a known instruction is an operand, not code
+        for start in range(max(0, cursor - 3), cursor):
+            instruction = self.instructions.get(start)
+            if instruction is not None and start + instruction.size > cursor:
+                return False
+        return True
+
+    def _build_blocks(self):
+        block = []
+        for cursor in sorted(self.instructions):
+            instruction = self.instructions[cursor]
+            if block and (cursor in self.leaders or block[-1].cursor + block[-1].size != cursor):
+                self._add_block(block)
+                block = []
+            block.append(instruction)
+            if instruction.is_jump() or instruction.op_code == HALT:
+                self._add_block(block)
+                block = []
+        if block:
+            self._add_block(block)
+        self._starts = sorted(self.blocks)
+
+    def _add_block(self, instructions):
+        block = BasicBlock(instructions)
+        last = instructions[-1]
+        if last.op_code == HALT:
+            pass
+        elif last.is_jump():
+            taken = last.jump_taken()
+            target = last.get_target()
+            if taken is not True:
+                block.successors.append(block.end)
+            if taken is not False:
+                if target is None:
+                    block.indirect = True
+                elif target in self.instructions:
+                    block.successors.append(target)
+        elif block.end in self.instructions:
+            block.successors.append(block.end)
+        self.blocks[block.start] = block
+
+    def is_code(self, idx):
+        return idx in self.code_cells
+
+    def get_data_cells(self):
+        return [idx for idx in range(len(self.image)) if idx not in self.code_cells]
+
+    """
+        Return the block containing the given address, None if it is data
+    """
+    def get_block(self, idx):
+        position = bisect_right(self._starts, idx) - 1
+        if position < 0:
+            return None
+        block = self.blocks[self._starts[position]]
+        return block if idx < block.end else None
+
+    """
+        Return True if a write with a known address lands on code.
+        Writes through the relative base are not checked: see relative_writes.
+    """
+    def is_self_modifying(self):
+        return not self.written_cells.isdisjoint(self.code_cells)
+
+    def get_successors(self):
+        return {start: list(block.successors) for start, block in self.blocks.items()}
+
+    def __str__(self):
+        return "\n".join(str(self.blocks[start]) for start in sorted(self.blocks))
+
+
+def analyze(optcode):
+    return ProgramAnalysis(list(optcode))
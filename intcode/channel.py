@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from queue import Empty
+
+
+class Channel:
+
+    """
+        Queue for interpreters driven from a single thread.
+        Same interface as queue.Queue for what the interpreter uses,
+        backed by a deque without any lock.
+    """
+    def __init__(self):
+        self.queue = deque()
+
+    def put(self, item):
+        self.queue.append(item)
+
+    def get(self):
+        try:
+            return self.queue.popleft()
+        except IndexError:
+            raise Empty
+
+    def empty(self):
+        return len(self.queue) == 0
+
+    def qsize(self):
+        return len(self.queue)
+
+    put_nowait = put
+    get_nowait = get
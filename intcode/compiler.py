@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+
+from types import FunctionType
+
+from .analysis import ProgramAnalysis
+from .interpreter import OptcodeInterpreter
+from .interpreter import split_code
+from .operations import HALT as OP_HALT
+from .operations import OPERATIONS
+from .operations import MODE_POSITION
+from .operations import MODE_PARAMETER
+from .operations import MORE_RELATIVE
+from .operations import get_instruction_size
+
+HALT = -1
+BLOCKED = -2
+
+MAX_FUSED = 32
+CODE_CACHE_SIZE = 4096
+ANALYSIS_CACHE_SIZE = 16
+
+# Static analysis by program image, interpreters loading the same program share it
+_analysis_cache = {}
+
+# Compiled handler code by op codes and modes of the block, shared by every interpreter
+_code_cache = {}
+
+
+class InstructionCompiler:
+
+    """
+        Turn the instructions at a cursor into a python function
+        handler(interpreter) -> next cursor
+        with the parameter modes already resolved.
+
+        Straight-line instructions are fused into a single handler, up to
+        the first jump, input, output or halt, so that a block costs one
+        dispatch. The handler owns the cells of every fused instruction:
+        a write to any of them drops it. A write landing on code from inside
+        the handler leaves it right after the write, so the rest of the block
+        is compiled again from the new cells. Instructions the program is
+        known to write, from the analysis done at load time or because it
+        already wrote them, are never fused after another one, so rewriting
+        them only rebuilds their own handler.
+        The handler code only depends on the op codes and modes of the block,
+        it is compiled once and shared: cursors and parameter values are
+        given to each handler as defaults, so new values never recompile.
+
+        :interpreter OptcodeInterpreter: interpreter owning the memory
+        :max_fused int: instructions fused in a handler, 1 to disable fusion
+    """
+    def __init__(self, interpreter, max_fused=MAX_FUSED):
+        self.interpreter = interpreter
+        self.memory = interpreter.memory
+        self.max_fused = max_fused
+        analysis = self.memory.analysis
+        self.written_cells = analysis.written_cells if analysis else set()
+
+    def _is_written(self, cursor, size):
+        cells = range(cursor, cursor + size)
+        return not self.written_cells.isdisjoint(cells) or not self.memory.written_code.isdisjoint(cells)
+
+    def _get_block(self, cursor):
+        memory = self.memory
+        dense = memory.memory
+        instructions = []
+        while len(instructions) < self.max_fused:
+            op_code = memory[cursor] % 100
+            size = get_instruction_size(op_code)
+            if size is None:
+                if not instructions:
+                    raise NotImplementedError("Operation %d" % op_code)
+                # Fail when (and if) the program gets there
+                break
+            if instructions and self._is_written(cursor, size):
+                # The program writes this instruction, it starts its own handler
+                break
+            if cursor + size <= len(dense):
+                instructions.append(tuple(dense[cursor:cursor + size]))
+            else:
+                instructions.append(tuple(memory[idx] for idx in range(cursor, cursor + size)))
+            cursor += size
+            if op_code == OP_HALT or OPERATIONS[op_code].ends_block:
+                break
+        return tuple(instructions)
+
+    def compile(self, cursor):
+        instructions = self._get_block(cursor)
+        # Cursors of every instruction and of the next one, then the parameter values
+        positions = [cursor]
+        for cells in instructions:
+            positions.append(positions[-1] + len(cells))
+        defaults = tuple(positions) + tuple(value for cells in instructions for value in cells[1:])
+        key = tuple(cells[0] for cells in instructions)
+        code = _code_cache.get(key)
+        if code is None:
+            code = self._compile_code(instructions)
+            if len(_code_cache) >= CODE_CACHE_SIZE:
+                del _code_cache[next(iter(_code_cache))]
+            _code_cache[key] = code
+        # The handler globals follow the memory storage when it is replaced
+        return FunctionType(code, self.memory.namespace, None, defaults), positions[-1] - cursor
+
+    """
+        Compile the handler code of a block, it only depends on the op codes
+        and modes: cursors and parameter values are the handler defaults
+        c<instruction> and p<instruction>_<parameter>
+    """
+    def _compile_code(self, instructions):
+        body = []
+        arguments = ["c%d=0" % n for n in range(len(instructions) + 1)]
+        for n, cells in enumerate(instructions):
+            op_code, modes = split_code(cells[0])
+            values = ["p%d_%d" % (n, k) for k in range(len(cells) - 1)]
+            arguments += ["%s=0" % value for value in values]
+            last = n == len(instructions) - 1
+            body += self._get_body("c%d" % n, "c%d" % (n + 1), op_code, modes, values, last)
+        source = "def handler(state, %s):\n" % ", ".join(arguments)
+        source += "\n".join("    " + line for line in body)
+        scope = {}
+        exec(compile(source, "<intcode>", "exec"), scope)
+        return scope["handler"].__code__
+
+    def _read(self, name, value, mode):
+        if mode == MODE_PARAMETER:
+            return ["%s = %s" % (name, value)]
+        elif mode == MODE_POSITION:
+            return [
+                "try:",
+                "    %s = mem[%s]" % (name, value),
+                "except IndexError:",
+                "    %s = memory[%s]" % (name, value),
+            ]
+        elif mode == MORE_RELATIVE:
+            return [
+                "%s = state.relative_base + %s" % (name, value),
+                "try:",
+                "    %s = mem[%s]" % (name, name),
+                "except IndexError:",
+                "    %s = memory[%s]" % (name, name),
+            ]
+        else:
+            raise Exception("Invalid mode %s" % mode)
+
+    def _write(self, expression, value, mode, exit_cursor=None):
+        if mode == MORE_RELATIVE:
+            address = "address"
+            lines = ["address = state.relative_base + %s" % value]
+        else:
+            address = value
+            lines = []
+        lines += [
+            "if %s in cells:" % address,
+            "    memory[%s] = %s" % (address, expression),
+        ]
+        if exit_cursor is not None:
+            lines += ["    return %s" % exit_cursor]
+        lines += [
+            "else:",
+            "    try:",
+            "        mem[%s] = %s" % (address, expression),
+            "    except (IndexError, OverflowError):",
+            "        memory[%s] = %s" % (address, expression),
+        ]
+        return lines
+
+    def _get_body(self, cursor, next_cursor, op_code, modes, values, last=True):
+        if op_code == OP_HALT:
+            return ["state.cursor = %s" % cursor, "return %d" % HALT]
+        elif op_code in (1, 2, 7, 8):
+            body = self._read("a", values[0], modes[0]) + self._read("b", values[1], modes[1])
+            if op_code == 1:
+                expression = "a + b"
+            elif op_code == 2:
+                expression = "a * b"
+            elif op_code == 7:
+                expression = "1 if a < b else 0"
+            else:
+                expression = "1 if a == b else 0"
+            body += self._write(expression, values[2], modes[2], None if last else next_cursor)
+        elif op_code == 3:
+            body = [
+                "state.cursor = %s" % cursor,
+                "if state._stopped:",
+                "    return %d" % HALT,
+                "if state.input_request_listener is not None:",
+                "    state.input_request_listener()",
+                "if state.block_on_input and state.input.empty():",
+                "    return %d" % BLOCKED,
+                "value = state.get_input()",
+            ]
+            body += self._write("value", values[0], modes[0])
+        elif op_code == 4:
+            body = [
+                "state.cursor = %s" % cursor,
+                "if state._stopped:",
+                "    return %d" % HALT,
+            ]
+            body += self._read("a", values[0], modes[0])
+            body += [
+                "state.set_output(a)",
+                "if state.pause_on_output:",
+                "    state.cursor = %s" % next_cursor,
+                "    return %d" % BLOCKED,
+            ]
+        elif op_code == 5 or op_code == 6:
+            body = self._read("a", values[0], modes[0]) + self._read("b", values[1], modes[1])
+            condition = "a != 0" if op_code == 5 else "a == 0"
+            body += [
+                "if %s:" % condition,
+                # Negative cursors are HALT and BLOCKED, never addresses
+                "    if b < 0:",
+                "        state.cursor = %s" % cursor,
+                "        raise IndexError(\"Jump to negative address %d\" % b)",
+                "    return b",
+                "return %s" % next_cursor,
+            ]
+            return body
+        else:
+            body = self._read("a", values[0], modes[0])
+            body += ["state.relative_base += a"]
+        if last:
+            body += ["return %s" % next_cursor]
+        return body
+
+
+class HandlerTable(dict):
+
+    """
+        Compiled handlers by cursor, compiled on first use.
+        Shares the instruction cache of the memory so that writes over
+        the code drop the stale handlers.
+    """
+    def __init__(self, compiler):
+        super().__init__()
+        self.compiler = compiler
+
+    def __missing__(self, cursor):
+        handler, size = self.compiler.compile(cursor)
+        self.compiler.memory.cache_instruction(cursor, handler, size)
+        return handler
+
+
+"""
+    Return the static analysis of the memory image, False if the image
+    does not start with code
+"""
+def load_analysis(memory):
+    image = tuple(memory.memory)
+    analysis = _analysis_cache.get(image)
+    if analysis is None:
+        try:
+            analysis = ProgramAnalysis(image)
+        except ValueError:
+            analysis = False
+        if len(_analysis_cache) >= ANALYSIS_CACHE_SIZE:
+            del _analysis_cache[next(iter(_analysis_cache))]
+        _analysis_cache[image] = analysis
+    return analysis
+
+
+class CompiledOptcodeInterpreter(OptcodeInterpreter):
+
+    """
+        Optcode interpreter running every instruction as a specialized
+        python function instead of going through the operation classes.
+        Same API as OptcodeInterpreter.
+        The cursor is only kept up to date on input, output and halt,
+        and stop() is only checked there.
+        The program is analysed once when it is loaded, forks share the analysis.
+    """
+    def set_memory(self, memory):
+        super().set_memory(memory)
+        if memory.analysis is None and len(memory) > 0:
+            memory.analysis = load_analysis(memory)
+        self.memory.instructions = HandlerTable(InstructionCompiler(self))
+
+    """
+        Handlers run whole blocks and do not keep the cursor up to date,
+        so a profiled run decodes instructions like OptcodeInterpreter.
+        The handlers are compiled again afterwards: the profiled run may
+        have written over the code they were compiled from.
+    """
+    def run_profiled(self, profiler):
+        self.memory.instructions = {}
+        try:
+            return super().run_profiled(profiler)
+        finally:
+            self.memory.instructions = HandlerTable(InstructionCompiler(self))
+
+    def _execute(self):
+        handlers = self.memory.instructions
+        cursor = self.cursor
+        while cursor >= 0:
+            cursor = handlers[cursor](self)
+        return cursor == HALT and not self._stopped
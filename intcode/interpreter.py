@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import time
+
+from queue import Queue
+from threading import Thread
+
+from .channel import Channel
+from .memory import OptcodeMemory
+from .operations import InputRequired
+from .operations import OutputReady
+from .operations import HALT
+from .operations import OPERATIONS
+from .operations import OptcodeParameter
+
+
+def split_code(code):
+    op_code = code % 100
+    modes = [code // 100 % 10, code // 1000 % 10, code // 10000 % 10]
+    return op_code, modes
+
+
+def get_queue_values(queue):
+    if isinstance(queue, Channel):
+        return list(queue.queue)
+    with queue.mutex:
+        return list(queue.queue)
+
+
+def set_queue_values(queue, values):
+    if isinstance(queue, Channel):
+        queue.queue.clear()
+        queue.queue.extend(values)
+        return
+    with queue.mutex:
+        queue.queue.clear()
+        queue.queue.extend(values)
+
+
+class OptcodeSnapshot:
+
+    """
+        Interpreter state captured by OptcodeInterpreter.snapshot
+
+        :memory OptcodeMemory: memory fork, never written
+        :cursor int: instruction pointer
+        :relative_base int: relative base
+        :input_values list: values waiting in the input queue
+        :output_values list: values waiting in the output queue
+    """
+    def __init__(self, memory, cursor, relative_base, input_values, output_values):
+        self.memory = memory
+        self.cursor = cursor
+        self.relative_base = relative_base
+        self.input_values = input_values
+        self.output_values = output_values
+
+
+class OptcodeInterpreter:
+
+    """
+        Optcode interpreter
+
+        :optcode int array: optcode array
+        :quiet_mode boolean: true if the interpreter should not display its output to screen
+        :ascii_mode boolean: true if input is given as characters and ascii output is written to screen
+    """
+    def __init__(self, optcode, input_queue=None, output_queue=None, quiet_mode=False, ascii_mode=False):
+        self.set_memory(OptcodeMemory(optcode))
+        self.input = input_queue if input_queue is not None else Queue()
+        self.output = output_queue if output_queue is not None else Queue()
+        self.cursor = 0
+        self.relative_base = 0
+        self.input_request_listener = None
+        self.output_request_listener = None
+        self.quiet_mode = quiet_mode
+        self.ascii_mode = ascii_mode
+        self.block_on_input = False
+        self.pause_on_output = False
+        self.trace = None
+        self._stopped = False
+
+    def set_memory(self, memory):
+        self.memory = memory
+
+    def get_input(self):
+        n = self.input.get()
+        if self.ascii_mode:
+            n = ord(n)
+        if self.trace is not None:
+            self.trace.record_input(n)
+        return n
+
+    def set_output(self, n):
+        if self.trace is not None:
+            self.trace.record_output(n)
+        if self.ascii_mode and n < 255:
+            if not self.quiet_mode:
+                sys.stdout.write(chr(n))
+            return
+        if not self.quiet_mode:
+            print("--> %d" % n)
+        if self.output_request_listener is not None:
+            self.output_request_listener(n)
+        else:
+            self.output.put(n)
+
+    """
+        Set a listener on input requested.
+        This function will be called when the interpreter is requesting input
+    """
+    def set_input_request_listener(self, input_request_listener):
+        self.input_request_listener = input_request_listener
+
+    """
+        Set a listener on output.
+        This function will be called with every value sent by the interpreter,
+        instead of putting it in the output queue
+    """
+    def set_output_request_listener(self, output_request_listener):
+        self.output_request_listener = output_request_listener
+
+    """
+        Record every input consumed and output sent in the trace,
+        None to stop recording
+    """
+    def set_trace(self, trace):
+        self.trace = trace
+
+    def get_parameters(self, number, modes):
+        parameters = []
+        for i in range(number):
+            mode = modes[i] if len(modes) > i else None
+            value = self.memory[self.cursor + 1 + i]
+            parameters.append(OptcodeParameter(value, mode))
+        return parameters
+
+    def get_operation(self):
+        operation = self.memory.instructions.get(self.cursor)
+        if operation is None:
+            operation = self.decode_operation()
+            if operation is not None:
+                size = 1 + operation.n_parameters
+                self.memory.cache_instruction(self.cursor, operation, size)
+        return operation
+
+    def decode_operation(self):
+        code = self.memory[self.cursor]
+        op_code, modes = split_code(code)
+        #print("========================")
+        #print("Cursor: %d, Base %d" % (self.cursor, self.relative_base))
+        #print("[%d] Code: %d" % (code, op_code))
+        #print(" Params %s" % str(modes))
+        if op_code == HALT:
+            return None
+        operation_class = OPERATIONS.get(op_code)
+        if operation_class is None:
+            raise NotImplementedError("Operation %d" % op_code)
+        operation = operation_class()
+        operation.parameters = self.get_parameters(operation.n_parameters, modes)
+        # print("Params: %s" % ",".join(list(map(lambda op: str(op), operation.parameters))))
+        return operation
+
+    """
+        Run the program until it halts.
+
+        :profiler OptcodeProfiler: optional, record every instruction executed
+    """
+    def run(self, profiler=None):
+        if profiler is None:
+            self.run_until_halted()
+        else:
+            self.run_profiled(profiler)
+
+    """
+        Run the program until it halts, recording every instruction in the profiler.
+        Instructions go through the decode cache and the operation classes.
+
+        :return True if the program halted, False if it was stopped
+    """
+    def run_profiled(self, profiler):
+        profiler.start(self)
+        try:
+            while not self._stopped:
+                cursor = self.cursor
+                operation = self.get_operation()
+                if operation is None:
+                    return True
+                op_code = self.memory[cursor] % 100
+                profiler.record(self, operation, op_code)
+                if op_code == 3:
+                    start = time.perf_counter()
+                    diff = operation.execute(self)
+                    profiler.record_input_wait(time.perf_counter() - start)
+                elif op_code == 9:
+                    relative_base = self.relative_base
+                    diff = operation.execute(self)
+                    profiler.record_relative_base(cursor, relative_base, self.relative_base)
+                else:
+                    diff = operation.execute(self)
+                if diff is not None:
+                    self.cursor += diff
+            return False
+        finally:
+            profiler.stop()
+
+    """
+        Run the program until it halts, waiting on the input queue when needed.
+
+        :return True if the program halted, False if it was stopped
+    """
+    def run_until_halted(self):
+        return self._execute()
+
+    """
+        Run the program until it halts or until it needs input
+        and the input queue is empty.
+        Call it again once there is input to resume the program.
+
+        :return True if the program halted
+    """
+    def run_until_blocked(self):
+        self.block_on_input = True
+        try:
+            return self._execute()
+        finally:
+            self.block_on_input = False
+
+    def _execute(self):
+        # Clean output?, maybe not
+        keep = True
+        try:
+            while keep:
+                if self._stopped:
+                    return False
+                operation = self.get_operation()
+                if operation is None:
+                    keep = False
+                else:
+                    diff = operation.execute(self)
+                    if diff is not None:
+                        self.cursor += diff
+        except (InputRequired, OutputReady):
+            return False
+        return True
+
+    """
+        Run the program as a generator.
+        Every output value is yielded as soon as it is sent, None is yielded
+        when the program needs input and the input queue is empty:
+        the value must then be given with send().
+        A value sent while resuming from an output is queued as input too.
+        The generator ends when the program halts or is stopped.
+        Use Channel queues to avoid any locking.
+    """
+    def coroutine(self):
+        while True:
+            self.block_on_input = True
+            self.pause_on_output = True
+            try:
+                halted = self._execute()
+            finally:
+                self.block_on_input = False
+                self.pause_on_output = False
+            while not self.output.empty():
+                value = yield self.output.get()
+                if value is not None:
+                    self.input.put(value)
+            if halted or self._stopped:
+                return
+            # Outputs not queued (ascii or listener) pause the program as well
+            if self.input.empty() and self.memory[self.cursor] % 100 == 3:
+                value = yield None
+                if value is not None:
+                    self.input.put(value)
+
+    def run_async(self):
+        thread = Thread(target=self.run)
+        thread.start()
+        return thread
+
+    """
+        Run the program as an asyncio task, with asyncio.Queue input and output.
+        Many interpreters can share one event loop this way, each one only
+        suspends when it waits for input.
+        The program itself runs on Channel queues, the values are moved from
+        and to the asyncio queues when it needs input or sends output.
+
+        :default_input int: value given when the program needs input and the
+            input queue is empty, instead of waiting. None to wait.
+        :return True if the program halted, False if it was stopped
+    """
+    async def arun(self, default_input=None):
+        inbox, outbox = self.input, self.output
+        self.input, self.output = Channel(), Channel()
+        try:
+            program = self.coroutine()
+            value = None
+            while True:
+                try:
+                    event = program.send(value)
+                except StopIteration:
+                    return not self._stopped
+                value = None
+                if event is not None:
+                    await outbox.put(event)
+                elif not inbox.empty():
+                    value = inbox.get_nowait()
+                    # Let the other tasks run even if this one never waits
+                    await asyncio.sleep(0)
+                elif default_input is not None:
+                    value = default_input
+                    await asyncio.sleep(0)
+                else:
+                    value = await inbox.get()
+        finally:
+            self.input, self.output = inbox, outbox
+
+    def stop(self):
+        self._stopped = True
+
+    """
+        Capture cursor, relative base, memory and queues.
+        The memory is shared copy-on-write, so taking a snapshot
+        does not copy the program.
+        The interpreter must not be running while this is called.
+    """
+    def snapshot(self):
+        return OptcodeSnapshot(self.memory.fork(), self.cursor, self.relative_base,
+                               get_queue_values(self.input), get_queue_values(self.output))
+
+    """
+        Bring the interpreter back to a snapshot.
+        Queues and listeners are kept, only their content is replaced.
+    """
+    def restore(self, snapshot):
+        self.set_memory(snapshot.memory.fork())
+        self.cursor = snapshot.cursor
+        self.relative_base = snapshot.relative_base
+        set_queue_values(self.input, snapshot.input_values)
+        set_queue_values(self.output, snapshot.output_values)
+        self._stopped = False
+
+    """
+        Return a new interpreter starting from the current state of this one.
+        The fork has its own queues, of the same type, and no listeners.
+    """
+    def fork(self):
+        return self.from_snapshot(self.snapshot(), type(self.input)(), type(self.output)(),
+                                  quiet_mode=self.quiet_mode, ascii_mode=self.ascii_mode)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, input_queue=None, output_queue=None, quiet_mode=False, ascii_mode=False):
+        interpreter = cls([], input_queue, output_queue, quiet_mode=quiet_mode, ascii_mode=ascii_mode)
+        interpreter.restore(snapshot)
+        return interpreter
+
+
+class Amplifier:
+
+    def __init__(self, name, optcode, phase_setting, quiet_mode=False):
+        self.name = name
+        self.optcode = optcode
+        self.phase_setting = phase_setting
+        self.quiet_mode = quiet_mode
+        self.output = Queue()
+
+    def get_output(self):
+        return self.output
+
+    def set_input(self, input):
+        self.input = input
+        self.input.put(self.phase_setting)
+
+    def run(self, input_signal=None):
+        if input_signal is not None:
+            self.input.put(input_signal)
+        interpreter = OptcodeInterpreter(self.optcode, self.input, self.output, quiet_mode=self.quiet_mode)
+        thread = Thread(target=interpreter.run)
+        thread.start()
+        return thread
+
+    """
+        Return the amplifier program as a generator, see OptcodeInterpreter.coroutine.
+        The phase setting is already queued.
+    """
+    def coroutine(self):
+        interpreter = OptcodeInterpreter(self.optcode, Channel(), Channel(), quiet_mode=self.quiet_mode)
+        interpreter.input.put(self.phase_setting)
+        return interpreter.coroutine()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+from array import array
+
+# Cells in a page of far memory
+PAGE_SIZE = 1024
+# Writes up to this many cells past the dense image grow it instead of paging
+NEAR_LIMIT = 64 * 1024
+
+
+
+class SharedCells(dict):
+
+    """
+        Instruction cells of a memory whose image is shared with a fork.
+        Every cell looks like code, so that compiled handlers route all
+        their writes through OptcodeMemory and the page gets copied first.
+        The real cells are kept and restored once the memory owns its image.
+    """
+    def __contains__(self, idx):
+        return True
+
+
+class ShadowedImage:
+
+    """
+        Dense storage of a memory that does not own its image: reads the
+        shared image through the pages shadowing it.
+        It has no length, so that nothing slices it or writes to it.
+    """
+    def __init__(self, image, pages):
+        self.image = image
+        self.pages = pages
+
+    def __len__(self):
+        return 0
+
+    def __getitem__(self, idx):
+        page = self.pages.get(idx // PAGE_SIZE)
+        if page is not None:
+            return page[idx % PAGE_SIZE]
+        if 0 <= idx < len(self.image):
+            return self.image[idx]
+        raise IndexError(idx)
+
+
+class OptcodeMemory:
+
+    """
+        Optcode memory
+
+        The program image is kept in a dense array of 64 bit integers,
+        writes far beyond it go to a table of fixed size pages.
+        Cells that are never written read as 0 and take no space.
+        The first value that does not fit in 64 bits turns the affected
+        storage into a plain list of python integers.
+
+        A fork shares the dense image with its parent, read only: a write
+        copies the page it lands on into the page table, where it shadows
+        the image. Far pages are shared and copied the same way.
+        Reads go through the pages as soon as one is shadowed, so
+        the memory takes an image of its own once half of it is shadowed
+        or once it has been written as many times as it has cells.
+
+        :optcode int array: program image
+    """
+    def __init__(self, optcode):
+        try:
+            self.memory = array('q', optcode)
+        except OverflowError:
+            self.memory = list(optcode)
+        self.pages = {}
+        # Decoded instructions by cursor and the cells they were decoded from
+        self.instructions = {}
+        self.instruction_cells = {}
+        # Code cells written by the program
+        self.written_code = set()
+        # Static analysis of the image, set by the interpreter loading it
+        self.analysis = None
+        # Dense image shared with other forks, None if this memory owns it
+        self._base = None
+        self._shared_pages = set()
+        self._shadowed = 0
+        self._shared_writes = 0
+        # Globals of the compiled handlers, kept in sync with the storage
+        self.namespace = {}
+        self._update_namespace()
+
+    def __len__(self):
+        if self._base is not None:
+            return len(self._base)
+        return len(self.memory)
+
+    def __getitem__(self, idx):
+        try:
+            return self.memory[idx]
+        except IndexError:
+            page = self.pages.get(idx // PAGE_SIZE)
+            if page is not None:
+                return page[idx % PAGE_SIZE]
+            if self._base is not None and 0 <= idx < len(self._base):
+                return self._base[idx]
+            return 0
+
+    def __setitem__(self, idx, item):
+        #print("Memr: Set memory[%d] = %d" % (idx, item))
+        if self._base is None or not self._set_shared(idx, item):
+            try:
+                self.memory[idx] = item
+            except IndexError:
+                if idx < 0:
+                    raise
+                if idx - len(self.memory) < NEAR_LIMIT:
+                    self._grow(idx + 1)
+                    self[idx] = item
+                else:
+                    self._set_far(idx, item)
+            except OverflowError:
+                self._unbox()
+                self.memory[idx] = item
+        if idx in self.instruction_cells:
+            self.invalidate(idx)
+
+    """
+        Write to a memory that does not own its image.
+        Return False if it took its image instead: the write is left to do.
+    """
+    def _set_shared(self, idx, item):
+        if idx < 0:
+            raise IndexError("Negative address %d" % idx)
+        key = idx // PAGE_SIZE
+        base = self._base
+        if key not in self.pages and key * PAGE_SIZE < len(base):
+            if (self._shadowed + 1) * PAGE_SIZE * 2 >= len(base):
+                # This page would shadow half of the image
+                self._own_image()
+                return False
+            page = base[key * PAGE_SIZE:(key + 1) * PAGE_SIZE]
+            page.extend([0] * (PAGE_SIZE - len(page)))
+            self.pages[key] = page
+            self._shadowed += 1
+        if self.memory is base:
+            # The image is now shadowed, read through the pages
+            self.memory = ShadowedImage(base, self.pages)
+            self._update_namespace()
+        self._set_far(idx, item)
+        self._shared_writes += 1
+        if self._shared_writes >= len(base):
+            self._own_image()
+        return True
+
+    def _set_far(self, idx, item):
+        key = idx // PAGE_SIZE
+        page = self.pages.get(key)
+        if page is None:
+            page = array('q', bytes(8 * PAGE_SIZE))
+            self.pages[key] = page
+        elif key in self._shared_pages:
+            page = page[:]
+            self.pages[key] = page
+            self._shared_pages.discard(key)
+        try:
+            page[idx % PAGE_SIZE] = item
+        except OverflowError:
+            page = list(page)
+            page[idx % PAGE_SIZE] = item
+            self.pages[key] = page
+
+    def _grow(self, size):
+        # Grow by at least half the current size to keep appends amortized,
+        # up to a page boundary so that no far page is split
+        start = len(self.memory)
+        size = max(size, start + start // 2)
+        size = -(-size // PAGE_SIZE) * PAGE_SIZE
+        if isinstance(self.memory, array):
+            self.memory.frombytes(bytes(8 * (size - start)))
+        else:
+            self.memory.extend([0] * (size - start))
+        # Far pages now covered by the dense image are merged into it
+        for key in sorted(self.pages):
+            if key * PAGE_SIZE >= size:
+                break
+            page = self.pages.pop(key)
+            self._shared_pages.discard(key)
+            for offset, value in enumerate(page):
+                idx = key * PAGE_SIZE + offset
+                if start <= idx < size and value != 0:
+                    self[idx] = value
+
+    """
+        Copy the shared image and the pages shadowing it into a dense image
+        owned by this memory
+    """
+    def _own_image(self):
+        image = self._base[:]
+        for key in range(-(-len(image) // PAGE_SIZE)):
+            page = self.pages.pop(key, None)
+            if page is None:
+                continue
+            self._shared_pages.discard(key)
+            if isinstance(page, list) and isinstance(image, array):
+                image = list(image)
+            if len(image) < key * PAGE_SIZE + len(page):
+                image.extend([0] * (key * PAGE_SIZE + len(page) - len(image)))
+            image[key * PAGE_SIZE:key * PAGE_SIZE + len(page)] = page
+        self.memory = image
+        self._base = None
+        self._shadowed = 0
+        self._shared_writes = 0
+        self.instruction_cells = dict(self.instruction_cells)
+        self._update_namespace()
+
+    def _update_namespace(self):
+        self.namespace["mem"] = self.memory
+        self.namespace["memory"] = self
+        self.namespace["cells"] = self.instruction_cells
+
+    def _unbox(self):
+        self.memory = list(self.memory)
+        self._update_namespace()
+
+    def cache_instruction(self, cursor, instruction, size):
+        self.instructions[cursor] = instruction
+        instruction_cells = self.instruction_cells
+        for idx in range(cursor, cursor + size):
+            cursors = instruction_cells.get(idx)
+            if cursors is None:
+                instruction_cells[idx] = {cursor}
+            else:
+                cursors.add(cursor)
+
+    """
+        Drop every decoded instruction that was read from the given cell.
+        Called when the program writes over its own code.
+        Other cells of a dropped instruction may keep a stale entry: at worst
+        it causes one more (harmless) invalidation later on.
+    """
+    def invalidate(self, idx):
+        cursors = self.instruction_cells.pop(idx, None)
+        if cursors is None:
+            return
+        self.written_code.add(idx)
+        for cursor in cursors:
+            self.instructions.pop(cursor, None)
+
+    """
+        Return a copy of the memory sharing the storage with this one.
+        Either memory copies a page on its first write to it: forking and
+        writing costs the pages written, not the size of the program.
+        Decoded instructions are not shared.
+    """
+    def fork(self):
+        if self._base is None:
+            self._base = self.memory
+        fork = OptcodeMemory([])
+        fork._base = self._base
+        fork.pages = dict(self.pages)
+        if self.memory is self._base:
+            fork.memory = self._base
+        else:
+            fork.memory = ShadowedImage(self._base, fork.pages)
+        fork._shadowed = self._shadowed
+        fork.analysis = self.analysis
+        for memory in (self, fork):
+            memory.instruction_cells = SharedCells(memory.instruction_cells)
+            memory._shared_pages = set(self.pages)
+            memory._update_namespace()
+        return fork
+
+    def copy(self):
+        copy = OptcodeMemory([])
+        copy._base = self._base if self._base is not None else self.memory
+        copy.pages = {key: page[:] for key, page in self.pages.items()}
+        copy._own_image()
+        copy.analysis = self.analysis
+        return copy
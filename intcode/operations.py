@@ -4,37 +4,81 @@ MODE_POSITION = 0
 MODE_PARAMETER = 1
 MORE_RELATIVE = 2
 
+HALT = 99
+
+
+class InputRequired(Exception):
+
+    """
+        Raised when the interpreter must stop and wait for input
+    """
+    pass
+
+
+class InputRefused(Exception):
+
+    """
+        Raised by an input request listener for a program that must not read input
+    """
+    pass
+
+
+class OutputReady(Exception):
+
+    """
+        Raised when the interpreter must stop after sending an output
+    """
+    pass
+
 
 class OptcodeParameter:
 
+    """
+        Instruction parameter.
+        The accessors are resolved once from the mode, so a decoded
+        instruction can be executed many times without re-checking it.
+    """
     def __init__(self, value, mode=None):
         self.value = value
         self.mode = mode if mode is not None else MODE_POSITION
+        if self.mode == MODE_POSITION:
+            self.get_actual_value = self._get_position_value
+            self.get_write_value = self._get_absolute_address
+        elif self.mode == MODE_PARAMETER:
+            self.get_actual_value = self._get_immediate_value
+            self.get_write_value = self._get_absolute_address
+        elif self.mode == MORE_RELATIVE:
+            self.get_actual_value = self._get_relative_value
+            self.get_write_value = self._get_relative_address
+        else:
+            raise Exception("Invalid mode %s" % self.mode)
 
     def __str__(self):
         return "%d [%d]" % (self.value, self.mode)
 
-    def get_actual_value(self, optcode):
-        if self.mode == MODE_POSITION or self.mode == MORE_RELATIVE:
-            delta = 0
-            if self.mode == MORE_RELATIVE:
-                delta = optcode.relative_base
-            return optcode.memory[delta + self.value]
-        elif self.mode == MODE_PARAMETER:
-            return self.value
-        else:
-            raise Exception("Invalid mode %s" % self.mode)
+    def _get_position_value(self, optcode):
+        return optcode.memory[self.value]
 
-    def get_write_value(self, optcode):
-        if self.mode == MORE_RELATIVE:
-            return optcode.relative_base + self.value
-        else:
-            return self.value
+    def _get_immediate_value(self, optcode):
+        return self.value
+
+    def _get_relative_value(self, optcode):
+        return optcode.memory[optcode.relative_base + self.value]
+
+    def _get_absolute_address(self, optcode):
+        return self.value
+
+    def _get_relative_address(self, optcode):
+        return optcode.relative_base + self.value
 
 
 class OptcodeOperation:
 
     n_parameters = 0
+    # The last parameter is the address written
+    writes = False
+    # The program may not go on with the next instruction: jumps, input and output
+    ends_block = False
 
     def __init__(self):
         self.parameters = None
@@ -55,6 +99,7 @@ class OptcodeOperation:
 
 class SumOperation(OptcodeOperation):
     n_parameters = 3
+    writes = True
 
     def execute_internal(self, optcode):
         first_el = self.parameters[0].get_actual_value(optcode)
@@ -66,6 +111,7 @@ class SumOperation(OptcodeOperation):
 
 class MultiplyOperation(OptcodeOperation):
     n_parameters = 3
+    writes = True
 
     def execute_internal(self, optcode):
         first_el = self.parameters[0].get_actual_value(optcode)
@@ -76,11 +122,15 @@ class MultiplyOperation(OptcodeOperation):
 
 class InputOperation(OptcodeOperation):
     n_parameters = 1
+    writes = True
+    ends_block = True
 
     def execute_internal(self, optcode):
         write_position = self.parameters[0].get_write_value(optcode)
         if optcode.input_request_listener is not None:
             optcode.input_request_listener()
+        if optcode.block_on_input and optcode.input.empty():
+            raise InputRequired
         val = optcode.get_input()
         optcode.memory[write_position] = val
 
@@ -88,21 +138,37 @@ class InputOperation(OptcodeOperation):
 
 class OutputOperation(OptcodeOperation):
     n_parameters = 1
+    ends_block = True
+
+    def execute(self, optcode):
+        self.execute_internal(optcode)
+        if optcode.pause_on_output:
+            optcode.cursor += 1 + len(self.parameters)
+            raise OutputReady
+        return 1 + len(self.parameters)
 
     def execute_internal(self, optcode):
         value = self.parameters[0].get_actual_value(optcode)
-        if not optcode.quiet_mode:
-            print("--> %d" % value)
         optcode.set_output(value)
 
 
+"""
+    Return the target of a jump, addresses are never negative
+"""
+def get_jump_target(target):
+    if target < 0:
+        raise IndexError("Jump to negative address %d" % target)
+    return target
+
+
 class JumpIfTrue(OptcodeOperation):
     n_parameters = 2
+    ends_block = True
 
     def execute(self, optcode):
         value = self.parameters[0].get_actual_value(optcode)
         if value != 0:
-            optcode.cursor = self.parameters[1].get_actual_value(optcode)
+            optcode.cursor = get_jump_target(self.parameters[1].get_actual_value(optcode))
             return None
         else:
             return 1 + len(self.parameters)
@@ -110,11 +176,12 @@ class JumpIfTrue(OptcodeOperation):
 
 class JumpIfFalse(OptcodeOperation):
     n_parameters = 2
+    ends_block = True
 
     def execute(self, optcode):
         value = self.parameters[0].get_actual_value(optcode)
         if value == 0:
-            optcode.cursor = self.parameters[1].get_actual_value(optcode)
+            optcode.cursor = get_jump_target(self.parameters[1].get_actual_value(optcode))
             return None
         else:
             return 1 + len(self.parameters)
@@ -122,6 +189,7 @@ class JumpIfFalse(OptcodeOperation):
 
 class LessThan(OptcodeOperation):
     n_parameters = 3
+    writes = True
 
     def execute_internal(self, optcode):
         first_val = self.parameters[0].get_actual_value(optcode)
@@ -135,6 +203,7 @@ class LessThan(OptcodeOperation):
 
 class EqualCheck(OptcodeOperation):
     n_parameters = 3
+    writes = True
 
     def execute_internal(self, optcode):
         first_val = self.parameters[0].get_actual_value(optcode)
@@ -153,3 +222,29 @@ class RelativeBaseAdjust(OptcodeOperation):
     def execute_internal(self, optcode):
         val = self.parameters[0].get_actual_value(optcode)
         optcode.relative_base += val
+
+
+# Operation class by op code, halt excluded
+OPERATIONS = {
+    1: SumOperation,
+    2: MultiplyOperation,
+    3: InputOperation,
+    4: OutputOperation,
+    5: JumpIfTrue,
+    6: JumpIfFalse,
+    7: LessThan,
+    8: EqualCheck,
+    9: RelativeBaseAdjust,
+}
+
+
+"""
+    Return the number of cells of an instruction, None if the op code is unknown
+"""
+def get_instruction_size(op_code):
+    if op_code == HALT:
+        return 1
+    operation = OPERATIONS.get(op_code)
+    if operation is None:
+        return None
+    return 1 + operation.n_parameters
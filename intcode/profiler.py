@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import time
+
+from collections import Counter
+
+from .analysis import analyze
+from .operations import InputOperation
+from .operations import OutputOperation
+
+MAIN_FRAME = "main"
+
+
+class OptcodeProfiler:
+
+    """
+        Execution profile of an interpreter run, see OptcodeInterpreter.run
+
+        Counts the executions of every cursor and op code, the time spent
+        waiting for input and the number of values sent.
+        Intcode has no call instruction: a positive relative base adjust
+        is taken as a function entry, named after its cursor, and lowering
+        the relative base below it as its return. This is how the puzzle
+        programs keep their stack frames.
+    """
+    def __init__(self):
+        self.cursor_counts = Counter()
+        self.op_code_counts = Counter()
+        self.stack_counts = Counter()
+        self.input_wait = 0.0
+        self.input_count = 0
+        self.output_count = 0
+        self.wall_time = 0.0
+        self.image = None
+        self._frames = [(MAIN_FRAME, None)]
+        self._stack = MAIN_FRAME
+        self._start = None
+
+    def start(self, interpreter):
+        if self.image is None:
+            memory = interpreter.memory
+            self.image = [memory[idx] for idx in range(len(memory))]
+        self._start = time.perf_counter()
+
+    def stop(self):
+        self.wall_time += time.perf_counter() - self._start
+
+    def record(self, interpreter, operation, op_code):
+        cursor = interpreter.cursor
+        self.cursor_counts[cursor] += 1
+        self.op_code_counts[op_code] += 1
+        self.stack_counts[self._stack] += 1
+        if isinstance(operation, InputOperation):
+            self.input_count += 1
+        elif isinstance(operation, OutputOperation):
+            self.output_count += 1
+
+    def record_input_wait(self, duration):
+        self.input_wait += duration
+
+    def record_relative_base(self, cursor, previous, relative_base):
+        frames = self._frames
+        if relative_base > previous:
+            frames.append(("fn_%d" % cursor, relative_base))
+        else:
+            while len(frames) > 1 and frames[-1][1] > relative_base:
+                frames.pop()
+        self._stack = ";".join(name for name, _ in frames)
+
+    def get_instruction_count(self):
+        return sum(self.op_code_counts.values())
+
+    """
+        Return the executed blocks as (block, executions, instructions),
+        the most executed instructions first.
+        Blocks are taken from a static analysis of the program at start,
+        code only found at run time is grouped under block None.
+    """
+    def get_hot_blocks(self, limit=10):
+        analysis = analyze(self.image)
+        blocks = {}
+        for cursor, count in self.cursor_counts.items():
+            block = analysis.get_block(cursor)
+            start = block.start if block is not None else None
+            executions, instructions = blocks.get(start, (0, 0))
+            if block is not None and cursor == block.start:
+                executions += count
+            blocks[start] = (executions, instructions + count)
+        hot = sorted(blocks.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [(analysis.blocks.get(start), executions, instructions)
+                for start, (executions, instructions) in hot]
+
+    def report(self, limit=10):
+        instructions = self.get_instruction_count()
+        run_time = self.wall_time - self.input_wait
+        lines = [
+            "Instructions: %d" % instructions,
+            "Wall time: %.3fs (%.3fs waiting for input)" % (self.wall_time, self.input_wait),
+            "Instructions/s: %.0f" % (instructions / run_time if run_time > 0 else 0),
+            "Inputs: %d, outputs: %d" % (self.input_count, self.output_count),
+            "",
+            "Op codes:",
+        ]
+        for op_code, count in self.op_code_counts.most_common():
+            lines.append("  %2d: %d" % (op_code, count))
+        lines += ["", "Hot blocks:"]
+        for block, executions, count in self.get_hot_blocks(limit):
+            if block is None:
+                lines.append("%d instructions outside the static code" % count)
+                continue
+            lines.append("%d instructions, %d executions" % (count, executions))
+            lines += ["  " + str(instruction) for instruction in block.instructions]
+        return "\n".join(lines)
+
+    """
+        Write the instruction counts by stack in the collapsed format
+        read by flamegraph.pl and speedscope
+    """
+    def write_collapsed(self, path):
+        with open(path, "w") as hand:
+            for stack, count in sorted(self.stack_counts.items()):
+                hand.write("%s %d\n" % (stack, count))
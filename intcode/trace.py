@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+from .channel import Channel
+
+MAGIC = b"ICT1"
+
+EVENT_INPUT = 0
+EVENT_OUTPUT = 1
+
+
+class TraceMismatch(Exception):
+
+    """
+        Raised when a replayed program does not send the recorded outputs
+    """
+    pass
+
+
+def zigzag(value):
+    # Small negative values stay small
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def encode_varint(value, buffer):
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def decode_varints(data, start=0):
+    value = 0
+    shift = 0
+    for byte in data[start:]:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value
+        value = 0
+        shift = 0
+    if shift:
+        raise ValueError("Truncated trace")
+
+
+class OptcodeTrace:
+
+    """
+        Inputs and outputs of an interpreter, in the order they happened.
+
+        Saved as MAGIC followed by one LEB128 varint per event: the value,
+        zigzag encoded, shifted left by one with the event type in the low bit.
+        Ascii inputs are recorded as their code.
+
+        :events (int, int) array: (event type, value)
+    """
+    def __init__(self, events=None):
+        self.events = events if events is not None else []
+
+    def record_input(self, value):
+        self.events.append((EVENT_INPUT, value))
+
+    def record_output(self, value):
+        self.events.append((EVENT_OUTPUT, value))
+
+    def get_inputs(self):
+        return [value for event, value in self.events if event == EVENT_INPUT]
+
+    def get_outputs(self):
+        return [value for event, value in self.events if event == EVENT_OUTPUT]
+
+    def to_bytes(self):
+        buffer = bytearray(MAGIC)
+        for event, value in self.events:
+            encode_varint(zigzag(value) << 1 | event, buffer)
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not an intcode trace")
+        events = []
+        for packed in decode_varints(data, len(MAGIC)):
+            events.append((packed & 1, unzigzag(packed >> 1)))
+        return cls(events)
+
+    def save(self, path):
+        with open(path, "wb") as hand:
+            hand.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as hand:
+            return cls.from_bytes(hand.read())
+
+
+"""
+    Run an interpreter on the inputs of a trace, without listeners.
+    Set up the memory as for the recorded run (e.g. free play) before.
+    The interpreter queues are replaced and ascii mode is turned off,
+    so the outputs are every value sent, as recorded.
+
+    :verify boolean: raise TraceMismatch if the outputs differ from the trace
+    :return the values sent
+"""
+def replay_trace(interpreter, trace, verify=True):
+    interpreter.input = Channel()
+    interpreter.output = Channel()
+    interpreter.input_request_listener = None
+    interpreter.output_request_listener = None
+    interpreter.ascii_mode = False
+    for value in trace.get_inputs():
+        interpreter.input.put(value)
+    interpreter.run_until_blocked()
+    outputs = list(interpreter.output.queue)
+    recorded = trace.get_outputs()
+    if verify and outputs != recorded:
+        for idx, (value, expected) in enumerate(zip(outputs, recorded)):
+            if value != expected:
+                raise TraceMismatch("Output %d is %d, %d recorded" % (idx, value, expected))
+        raise TraceMismatch("Replay sent %d values, %d recorded" % (len(outputs), len(recorded)))
+    return outputs